@@ -1,36 +1,43 @@
-from typing import List, Optional, Any
+from typing import List, Optional, Any, AsyncIterator, Tuple, Callable
 from pydantic import BaseModel
 import os
 from dotenv import load_dotenv
 from langchain_groq import ChatGroq
-from langchain.agents import AgentExecutor, create_tool_calling_agent
+from langchain.agents import create_tool_calling_agent
+from langchain.agents.agent import RunnableMultiActionAgent
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.messages import HumanMessage, AIMessage
+from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 from langchain.tools import tool
 from sqlalchemy.orm import Session
 from datetime import datetime
 from tools.ticket_parser import find_tickets
+from ai.tool_context import bind_tool_context, get_tool_context
+from ai.executor import ConcurrentAgentExecutor
+from metrics import metrics_callback
+from ai.llm_cache import LLM_RESPONSE_CACHE, response_cache
 
 load_dotenv()
 
-global_db = None
-global_roadmap_id = None
+# Prints every agent step to stdout; only meant for local debugging.
+AGENT_VERBOSE = os.getenv("AGENT_VERBOSE", "false").lower() == "true"
 
 @tool
-def find_tickets_tool(departure_id: str, destination_id: str, start_date: str, end_date: str) -> Any:
+async def find_tickets_tool(departure_id: str, destination_id: str, start_date: str, end_date: str) -> Any:
     """Find tickets for a given departure and destination and dates and saves them to the database. departure_id and destination_id are IATA codes. start_date and end_date are dates in the format YYYY-MM-DD"""
-    return find_tickets(global_db, global_roadmap_id, departure_id, destination_id, start_date, end_date)
+    context = get_tool_context()
+    with context.session_factory() as db:
+        return await find_tickets(db, context.roadmap_id, departure_id, destination_id, start_date, end_date)
 
 @tool
 def find_hotels_tool(destination: str, check_in_date: str, check_out_date: str, preference: str) -> str:
     """Find hotels for a given destination, date range, and preference. Logs to terminal when called."""
-    print(f"[TOOL] find_hotels_tool called with: roadmap_id={global_roadmap_id}, destination={destination}, check_in_date={check_in_date}, check_out_date={check_out_date}, preference={preference}")
+    print(f"[TOOL] find_hotels_tool called with: roadmap_id={get_tool_context().roadmap_id}, destination={destination}, check_in_date={check_in_date}, check_out_date={check_out_date}, preference={preference}")
     return f"Hotel found in {destination} ({preference}) from {check_in_date} to {check_out_date}."
 
 @tool
 def find_activities_tool(destination: str, interests: list) -> str:
     """Find activities for a given destination and list of interests. Logs to terminal when called."""
-    print(f"[TOOL] find_activities_tool called with: roadmap_id={global_roadmap_id}, destination={destination}, interests={interests}")
+    print(f"[TOOL] find_activities_tool called with: roadmap_id={get_tool_context().roadmap_id}, destination={destination}, interests={interests}")
     return f"Activities found in {destination} for interests: {', '.join(interests)}."
 
 class Message(BaseModel):
@@ -40,40 +47,50 @@ class Message(BaseModel):
 class ChatRequest(BaseModel):
     messages: List[Message]
     roadmap_id: int
+    summary: Optional[str] = None  # covers the turns before `messages`
 
 class ChatResponse(BaseModel):
     response: str
     tool_output: Optional[Any] = None
 
 class AIAgent:
-    def __init__(self):
-        self.llm = ChatGroq(
+    def __init__(self, llm: Optional[Any] = None, verbose: bool = AGENT_VERBOSE):
+        self.llm = llm or ChatGroq(
             model="meta-llama/llama-4-maverick-17b-128e-instruct",
             temperature=0.7,
             groq_api_key=os.environ.get("GROQ_API_KEY"),
+            cache=response_cache if LLM_RESPONSE_CACHE else None,
         )
         self.prompt = ChatPromptTemplate.from_messages([
-            ("system", """You are a friendly and helpful travel planning assistant.\nYour goal is to help the user plan a trip by gathering their preferences step-by-step.\n\nAs soon as you have all the information needed for a planning step (like travel dates, hotel preferences, or interests), IMMEDIATELY use the appropriate tool. Do not wait for further user input if you can proceed.\n\nAfter using a tool, confirm with the user and ask for the next missing piece of information.\n\nIf you do not have enough information for a tool, ask the user a clear, specific question to get it.\n\nAlways be friendly and conversational.\n\nExample:\nUser: I want to go to Paris from July 10 to July 15.\nThought: I have the destination and dates. I should find tickets.\nAction: find_tickets_tool(destination='Paris', start_date='2024-07-10', end_date='2024-07-15')\nObservation: Tickets found for Paris from 2024-07-10 to 2024-07-15.\nFinal Answer: I found tickets for Paris from July 10 to July 15! Would you like to look for hotels next?\n\nBased on the user's request, you can:\n1.  Ask for clarifying information if you don't have enough details (e.g., travel dates, hotel preferences, interests).\n2.  Use the available tools if you have all the necessary information for a planning step.\n\nAfter a tool is used successfully, confirm with the user and ask what they'd like to do next. YOU HAVE TO USE TOOLS IF IT IS NEEDED (WHEN SEARCHING FOR TICKETS/HOTLES/FOOD/ACTIVITY). YOU SHOULD CALL 1 TOOL AT A MESSAGE"""),
+            ("system", """You are a friendly and helpful travel planning assistant.\nYour goal is to help the user plan a trip by gathering their preferences step-by-step.\n\nAs soon as you have all the information needed for a planning step (like travel dates, hotel preferences, or interests), IMMEDIATELY use the appropriate tool. Do not wait for further user input if you can proceed.\n\nAfter using a tool, confirm with the user and ask for the next missing piece of information.\n\nIf you do not have enough information for a tool, ask the user a clear, specific question to get it.\n\nAlways be friendly and conversational.\n\nExample:\nUser: I want to go to Paris from July 10 to July 15.\nThought: I have the destination and dates. I should find tickets.\nAction: find_tickets_tool(destination='Paris', start_date='2024-07-10', end_date='2024-07-15')\nObservation: Tickets found for Paris from 2024-07-10 to 2024-07-15.\nFinal Answer: I found tickets for Paris from July 10 to July 15! Would you like to look for hotels next?\n\nBased on the user's request, you can:\n1.  Ask for clarifying information if you don't have enough details (e.g., travel dates, hotel preferences, interests).\n2.  Use the available tools if you have all the necessary information for a planning step.\n\nAfter a tool is used successfully, confirm with the user and ask what they'd like to do next. YOU HAVE TO USE TOOLS IF IT IS NEEDED (WHEN SEARCHING FOR TICKETS/HOTLES/FOOD/ACTIVITY). WHEN SEVERAL SEARCHES ARE INDEPENDENT (E.G. TICKETS AND HOTELS FOR THE SAME TRIP), CALL THOSE TOOLS IN THE SAME MESSAGE; THEY RUN AT THE SAME TIME"""),
             ("placeholder", "{chat_history}"),
             ("human", "{input}"),
             ("placeholder", "{agent_scratchpad}"),
         ])
+        # The executors are stateless between runs (per-request values travel through
+        # ai.tool_context), so they are built once and shared by all requests.
+        self.tools = [find_tickets_tool, find_hotels_tool, find_activities_tool]
+        self.agent = create_tool_calling_agent(self.llm, self.tools, self.prompt)
+        # chat() invokes the model instead of streaming it: astream() bypasses the LLM
+        # response cache, only invoke goes through it. stream() keeps the token stream.
+        self.agent_executor = ConcurrentAgentExecutor(
+            agent=RunnableMultiActionAgent(runnable=self.agent, stream_runnable=False),
+            tools=self.tools, verbose=verbose, return_intermediate_steps=True,
+        )
+        self.stream_executor = ConcurrentAgentExecutor(agent=self.agent, tools=self.tools, verbose=verbose, return_intermediate_steps=True)
 
-    async def chat(self, request: ChatRequest, db: Session) -> ChatResponse:
-        global global_db, global_roadmap_id
-        global_db = db
-        global_roadmap_id = request.roadmap_id
-        tools = [find_tickets_tool, find_hotels_tool, find_activities_tool]
-        agent = create_tool_calling_agent(self.llm, tools, self.prompt)
-        agent_executor = AgentExecutor(agent=agent, tools=tools, verbose=True, return_intermediate_steps=True)
+    def _build_inputs(self, request: ChatRequest) -> dict:
         chat_history = []
+        if request.summary:
+            chat_history.append(SystemMessage(content=f"Summary of the earlier conversation:\n{request.summary}"))
         for msg in request.messages[:-1]:
             chat_history.append(HumanMessage(content=msg.content) if msg.role == "user" else AIMessage(content=msg.content))
-        user_input = request.messages[-1].content
-        response = await agent_executor.ainvoke({
-            "input": user_input,
+        return {
+            "input": request.messages[-1].content,
             "chat_history": chat_history,
-        })
+        }
+
+    def _build_response(self, response: dict) -> ChatResponse:
         tool_output = None
         for step in response.get('intermediate_steps', []):
             if isinstance(step, tuple) and len(step) == 2:
@@ -89,4 +106,30 @@ class AIAgent:
             has_return = any(any(seg.get('direction') == 'return' for seg in f['segments']) for f in tool_output)
             if has_outbound and has_return:
                 reply = 'Here are your outbound and return flight options. ' + reply
-        return ChatResponse(response=reply, tool_output=tool_output)
\ No newline at end of file
+        return ChatResponse(response=reply, tool_output=tool_output)
+
+    async def chat(self, request: ChatRequest, session_factory: Callable[[], Session]) -> ChatResponse:
+        with bind_tool_context(session_factory, request.roadmap_id):
+            response = await self.agent_executor.ainvoke(self._build_inputs(request), config={"callbacks": [metrics_callback]})
+        return self._build_response(response)
+
+    async def stream(self, request: ChatRequest, session_factory: Callable[[], Session]) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Runs the agent and yields (event, data) pairs as they happen:
+        ("token", str) for LLM output, ("tool_start", dict) / ("tool_end", dict) around tool
+        calls, and finally ("done", ChatResponse) with the same result chat() returns.
+        """
+        with bind_tool_context(session_factory, request.roadmap_id):
+            async for event in self.stream_executor.astream_events(self._build_inputs(request), config={"callbacks": [metrics_callback]}, version="v2"):
+                kind = event["event"]
+                if kind == "on_chat_model_stream":
+                    content = event["data"]["chunk"].content
+                    if content:
+                        yield "token", content
+                elif kind == "on_tool_start":
+                    yield "tool_start", {"tool": event["name"], "input": event["data"].get("input")}
+                elif kind == "on_tool_end":
+                    yield "tool_end", {"tool": event["name"]}
+                elif kind == "on_chain_end" and not event.get("parent_ids"):
+                    # The root run is the AgentExecutor itself; its output has the final answer.
+                    yield "done", self._build_response(event["data"]["output"])
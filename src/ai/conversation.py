@@ -1,10 +1,41 @@
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime
 from pydantic import BaseModel, Field
 from schemas.models import ChatConversation, ChatMessage, UserInDB
-from sqlalchemy.orm import Session
+from sqlalchemy import select, func, tuple_
+from sqlalchemy.orm import Session, selectinload, aliased
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import async_binary_redis_client
+import redis
+import base64
+import codec
+import os
 import uuid
 
+# Last CONTEXT_CACHE_SIZE messages of each conversation are mirrored in a Redis list so
+# most turns can build the agent context without touching Postgres.
+CONTEXT_CACHE_SIZE = int(os.getenv("CONTEXT_CACHE_SIZE", "20"))
+CONTEXT_CACHE_TTL = int(os.getenv("CONTEXT_CACHE_TTL", "86400"))
+
+def _context_key(user: UserInDB, conversation_id) -> str:
+    # Scoped by user: a hit implies the conversation belongs to them.
+    return f"chat_context:{user.id}:{conversation_id}"
+
+def _context_entry(message: ChatMessage) -> bytes:
+    return codec.dumps({"id": message.id, "role": message.role, "content": message.content})
+
+def encode_cursor(conversation: ChatConversation) -> str:
+    raw = f"{conversation.last_updated.isoformat()}|{conversation.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    """Raises ValueError for a malformed cursor."""
+    try:
+        last_updated, conversation_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(last_updated), uuid.UUID(conversation_id)
+    except (UnicodeError, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
 class Conversation(BaseModel):
     id: str = Field(..., description="Unique conversation ID")
     messages: List[Dict] = Field(default_factory=list, description="List of messages in the conversation")
@@ -28,28 +59,184 @@ class ConversationManager:
         except ValueError:
             return None
 
-    def add_message(self, db: Session, user: UserInDB, conversation_id: str, role: str, content: str):
-        conversation = self.get_conversation(db, user, conversation_id)
-        if not conversation:
-            conversation = self.create_conversation(db, user, conversation_id=conversation_id)
-        
-        message = ChatMessage(conversation_id=conversation.id, role=role, content=content)
-        db.add(message)
-        db.commit()
-        db.refresh(message)
-        return message
+    async def _push_context(self, key: str, entries: List[bytes]):
+        """Write-through of committed messages into the cached window, if one exists."""
+        try:
+            async with async_binary_redis_client.pipeline() as pipe:
+                # The version bump makes a concurrent _cache_context() discard its DB snapshot.
+                pipe.incr(f"{key}:version")
+                pipe.expire(f"{key}:version", CONTEXT_CACHE_TTL)
+                pipe.rpushx(key, *entries)
+                pipe.ltrim(key, -CONTEXT_CACHE_SIZE, -1)
+                pipe.expire(key, CONTEXT_CACHE_TTL)
+                await pipe.execute()
+        except redis.RedisError:
+            # Without the version bump a stale window could survive; drop it instead.
+            try:
+                await async_binary_redis_client.delete(key)
+            except redis.RedisError:
+                pass
+
+    async def _cache_context(self, key: str, version: Optional[bytes], entries: List[bytes]):
+        """Stores a DB snapshot as the cached window unless a write happened since `version` was read."""
+        try:
+            async with async_binary_redis_client.pipeline() as pipe:
+                await pipe.watch(f"{key}:version")
+                if await pipe.get(f"{key}:version") != version:
+                    return
+                pipe.multi()
+                pipe.delete(key)
+                pipe.rpush(key, *entries[-CONTEXT_CACHE_SIZE:])
+                pipe.expire(key, CONTEXT_CACHE_TTL)
+                await pipe.execute()
+        except redis.RedisError:
+            # Includes WatchError: a message was added meanwhile, the next turn re-reads.
+            pass
+
+    async def _read_cached_context(self, key: str, max_messages: int, after_id: Optional[int] = None) -> Tuple[Optional[bytes], Optional[List[Dict]]]:
+        """Returns (version, context); context is None on a miss, version feeds _cache_context()."""
+        if max_messages > CONTEXT_CACHE_SIZE:
+            return None, None
+        try:
+            async with async_binary_redis_client.pipeline(transaction=False) as pipe:
+                pipe.get(f"{key}:version")
+                pipe.lrange(key, -max_messages, -1)
+                version, cached = await pipe.execute()
+        except redis.RedisError:
+            return None, None
+        if not cached:
+            return version, None
+        return version, [{"role": m["role"], "content": m["content"]} for m in map(codec.loads, cached) if m["id"] > (after_id or 0)]
 
-    def get_context(self, db: Session, user: UserInDB, conversation_id: str, max_messages: int = 10) -> List[Dict]:
-        conversation = self.get_conversation(db, user, conversation_id)
+    def _recent_messages_query(self, conversation_id: uuid.UUID, max_messages: int):
+        # Newest first so the (conversation_id, timestamp) index can stop after LIMIT rows
+        return (
+            select(ChatMessage)
+            .where(ChatMessage.conversation_id == conversation_id)
+            .order_by(ChatMessage.timestamp.desc(), ChatMessage.id.desc())
+            .limit(max(max_messages, CONTEXT_CACHE_SIZE))
+        )
+
+    async def _finish_context(self, key: str, version: Optional[bytes], newest_first: List[ChatMessage], max_messages: int, after_id: Optional[int] = None) -> List[Dict]:
+        messages = list(reversed(newest_first))
+        if messages and max_messages <= CONTEXT_CACHE_SIZE:
+            await self._cache_context(key, version, [_context_entry(m) for m in messages])
+        recent_messages = messages[-max_messages:]
+        return [{"role": m.role, "content": m.content} for m in recent_messages if m.id > (after_id or 0)]
+
+    async def aget_conversation(self, db: AsyncSession, user: UserInDB, conversation_id: str, with_messages: bool = False) -> Optional[ChatConversation]:
+        try:
+            conv_id = uuid.UUID(conversation_id)
+        except ValueError:
+            return None
+        query = select(ChatConversation).where(ChatConversation.id == conv_id, ChatConversation.user_id == user.id)
+        if with_messages:
+            # Lazy loading is not available on AsyncSession
+            query = query.options(selectinload(ChatConversation.messages))
+        return (await db.execute(query)).scalars().first()
+
+    async def aadd_messages(self, db: AsyncSession, user: UserInDB, conversation_id: str, messages: List[Tuple[str, str]]) -> ChatConversation:
+        """
+        Stores all (role, content) messages of a turn with a single flush and commit,
+        creating the conversation if needed. Returns the conversation.
+        """
+        conversation = await self.aget_conversation(db, user, conversation_id)
+        created = conversation is None
+        if created:
+            conversation = ChatConversation(id=uuid.UUID(conversation_id), user_id=user.id)
+            db.add(conversation)
+
+        rows = [ChatMessage(conversation_id=conversation.id, role=role, content=content) for role, content in messages]
+        db.add_all(rows)
+        conversation.last_updated = datetime.utcnow()
+        # The flush batches the INSERTs into one statement and assigns ids; entries are
+        # built before commit() expires the rows, to avoid one refresh per message.
+        await db.flush()
+        entries = [_context_entry(m) for m in rows]
+        key = _context_key(user, conversation.id)
+        await db.commit()
+
+        if created:
+            # A brand-new conversation is complete in memory; seed its cached window.
+            await self._cache_context(key, None, entries)
+        else:
+            await self._push_context(key, entries)
+        return conversation
+
+    async def aget_context(self, db: AsyncSession, user: UserInDB, conversation_id: str, max_messages: int = 10, after_id: Optional[int] = None) -> List[Dict]:
+        """
+        The newest max_messages messages as {role, content}, oldest first. With after_id
+        (the conversation's summarized_until_id) only messages the summary does not cover
+        are returned, so none reaches the prompt twice.
+        """
+        try:
+            conv_id = uuid.UUID(conversation_id)
+        except ValueError:
+            return []
+
+        key = _context_key(user, conv_id)
+        version, cached = await self._read_cached_context(key, max_messages, after_id)
+        if cached is not None:
+            return cached
+
+        conversation = await self.aget_conversation(db, user, conversation_id)
         if not conversation:
             return []
-        
-        messages = db.query(ChatMessage).filter(ChatMessage.conversation_id == conversation.id).order_by(ChatMessage.timestamp).all()
-        recent_messages = messages[-max_messages:]
-        return [{"role": m.role, "content": m.content} for m in recent_messages]
 
-    def get_user_conversations(self, db: Session, user: UserInDB) -> List[ChatConversation]:
-        return db.query(ChatConversation).filter(ChatConversation.user_id == user.id).all()
+        messages = (await db.execute(self._recent_messages_query(conversation.id, max_messages))).scalars().all()
+        return await self._finish_context(key, version, messages, max_messages, after_id)
+
+    async def aget_conversation_page(
+        self,
+        db: AsyncSession,
+        user: UserInDB,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        max_messages: int = 0,
+    ) -> Tuple[List[ChatConversation], Dict[uuid.UUID, List[ChatMessage]], Optional[str]]:
+        """
+        One page of the user's conversations, most recently updated first, plus the last
+        max_messages messages of each (none for summary rows) and the cursor of the next page.
+        Pages are keyed on (last_updated, id), so every page costs the same however many
+        conversations the user has. Raises ValueError for a malformed cursor.
+        """
+        query = select(ChatConversation).where(ChatConversation.user_id == user.id)
+        if cursor:
+            last_updated, conversation_id = decode_cursor(cursor)
+            query = query.where(tuple_(ChatConversation.last_updated, ChatConversation.id) < (last_updated, conversation_id))
+        query = query.order_by(ChatConversation.last_updated.desc(), ChatConversation.id.desc()).limit(limit + 1)
+        conversations = (await db.execute(query)).scalars().all()
+
+        next_cursor = None
+        if len(conversations) > limit:
+            conversations = conversations[:limit]
+            next_cursor = encode_cursor(conversations[-1])
+
+        messages = {c.id: [] for c in conversations}
+        if conversations and max_messages > 0:
+            for message in (await db.execute(self._page_messages_query(list(messages), max_messages))).scalars():
+                messages[message.conversation_id].append(message)
+        return conversations, messages, next_cursor
+
+    def _page_messages_query(self, conversation_ids: List[uuid.UUID], max_messages: int):
+        # Like selectinload, one query for the whole page, but capped per conversation.
+        ranked = (
+            select(
+                ChatMessage,
+                func.row_number().over(
+                    partition_by=ChatMessage.conversation_id,
+                    order_by=(ChatMessage.timestamp.desc(), ChatMessage.id.desc()),
+                ).label("position"),
+            )
+            .where(ChatMessage.conversation_id.in_(conversation_ids))
+            .subquery()
+        )
+        message = aliased(ChatMessage, ranked)
+        return (
+            select(message)
+            .where(ranked.c.position <= max_messages)
+            .order_by(message.conversation_id, message.timestamp, message.id)
+        )
 
     def update_context(self, conversation_id: str, context: Dict):
         # This method is not used in the chat flow, but left for completeness.
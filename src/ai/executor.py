@@ -0,0 +1,64 @@
+import asyncio
+import os
+import uuid
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional
+
+from langchain.agents import AgentExecutor
+from langchain_core.agents import AgentAction, AgentStep
+from langchain_core.callbacks import AsyncCallbackManagerForChainRun
+from langchain_core.tools import BaseTool
+
+# Tool calls of one agent step run concurrently (AgentExecutor gathers them on the async
+# path), at most AGENT_TOOL_CONCURRENCY at a time per agent run, each bounded by
+# AGENT_TOOL_TIMEOUT seconds.
+AGENT_TOOL_CONCURRENCY = int(os.getenv("AGENT_TOOL_CONCURRENCY", "4"))
+AGENT_TOOL_TIMEOUT = float(os.getenv("AGENT_TOOL_TIMEOUT", "60"))
+
+# run id -> [semaphore, tool calls holding or waiting for it]
+_run_limits: Dict[uuid.UUID, List] = {}
+
+
+@asynccontextmanager
+async def _tool_slot(run_id: uuid.UUID, limit: int) -> AsyncIterator[None]:
+    entry = _run_limits.setdefault(run_id, [asyncio.Semaphore(limit), 0])
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            yield
+    finally:
+        entry[1] -= 1
+        if not entry[1]:
+            del _run_limits[run_id]
+
+
+class ConcurrentAgentExecutor(AgentExecutor):
+    """
+    AgentExecutor whose tool calls are capped and time-limited. Observations still come
+    back in the order the model emitted the calls, so the scratchpad is unchanged; a call
+    that times out gets an observation saying so and the agent carries on.
+    """
+
+    max_tool_concurrency: int = AGENT_TOOL_CONCURRENCY
+    tool_timeout: Optional[float] = AGENT_TOOL_TIMEOUT
+
+    async def _aperform_agent_action(
+        self,
+        name_to_tool_map: Dict[str, BaseTool],
+        color_mapping: Dict[str, str],
+        agent_action: AgentAction,
+        run_manager: Optional[AsyncCallbackManagerForChainRun] = None,
+    ) -> AgentStep:
+        run_id = run_manager.run_id if run_manager else uuid.uuid4()
+        async with _tool_slot(run_id, self.max_tool_concurrency):
+            try:
+                return await asyncio.wait_for(
+                    super()._aperform_agent_action(name_to_tool_map, color_mapping, agent_action, run_manager),
+                    timeout=self.tool_timeout,
+                )
+            except asyncio.TimeoutError:
+                # A sync tool keeps running in its thread; only its result is dropped.
+                return AgentStep(
+                    action=agent_action,
+                    observation=f"{agent_action.tool} did not finish within {self.tool_timeout:g} seconds. Tell the user and offer to try again.",
+                )
@@ -0,0 +1,103 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from cachetools import TTLCache
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+
+# Opt-in, per-process cache of agent LLM responses. The key covers the model and its
+# settings, the bound tool schemas (both in llm_string), the system prompt, the chat
+# history and the user input (all in the serialized prompt).
+LLM_RESPONSE_CACHE = os.getenv("LLM_RESPONSE_CACHE", "false").lower() == "true"
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "1024"))
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", "3600"))
+
+
+def _normalize(prompt: str) -> str:
+    """Case- and whitespace-insensitive message contents; message ids are left out."""
+    try:
+        messages = json.loads(prompt)
+    except ValueError:
+        return prompt
+    for message in messages:
+        kwargs = message.get("kwargs", {}) if isinstance(message, dict) else {}
+        kwargs.pop("id", None)
+        if isinstance(kwargs.get("content"), str):
+            kwargs["content"] = " ".join(kwargs["content"].split()).lower()
+    return json.dumps(messages, sort_keys=True)
+
+
+class LLMResponseCache(BaseCache):
+    """
+    Exact-match cache after case and whitespace normalization of the messages. Turns that involve tools
+    are never cached: prompts carrying tool results (the answer depends on live search
+    data) and responses that request a tool call (the tool must actually run).
+    """
+
+    def __init__(self, maxsize: int = LLM_CACHE_SIZE, ttl: int = LLM_CACHE_TTL):
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        # Miss time per key, to learn how long the model took to answer it
+        self._pending = TTLCache(maxsize=maxsize, ttl=300)
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "bypassed": 0, "saved_seconds": 0.0}
+
+    def _key(self, prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\x00{_normalize(prompt)}".encode()).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        if '"ToolMessage"' in prompt:
+            with self._lock:
+                self._stats["bypassed"] += 1
+            return None
+        key = self._key(prompt, llm_string)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                self._pending[key] = time.perf_counter()
+                return None
+            generations, latency = entry
+            self._stats["hits"] += 1
+            self._stats["saved_seconds"] += latency
+        # Callers may mutate the returned messages
+        return [generation.model_copy(deep=True) for generation in generations]
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        if '"ToolMessage"' in prompt:
+            return
+        if any(getattr(getattr(g, "message", None), "tool_calls", None) for g in return_val):
+            return
+        key = self._key(prompt, llm_string)
+        with self._lock:
+            started = self._pending.pop(key, None)
+            latency = time.perf_counter() - started if started is not None else 0.0
+            self._entries[key] = ([generation.model_copy(deep=True) for generation in return_val], latency)
+
+    async def alookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        return self.lookup(prompt, llm_string)
+
+    async def aupdate(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        self.update(prompt, llm_string, return_val)
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._pending.clear()
+
+    async def aclear(self, **kwargs: Any) -> None:
+        self.clear()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+        stats["enabled"] = LLM_RESPONSE_CACHE
+        return stats
+
+
+response_cache = LLMResponseCache()
@@ -0,0 +1,107 @@
+import os
+import uuid
+from typing import Dict, List, Optional
+
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_groq import ChatGroq
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from schemas.models import ChatConversation, ChatMessage
+
+# Prompt compaction: the agent gets the conversation summary plus the newest messages that
+# fit in SUMMARY_TOKEN_BUDGET. Older turns are folded into ChatConversation.summary by the
+# summarize_conversation Celery task, SUMMARY_MIN_BATCH messages or more at a time.
+SUMMARY_TOKEN_BUDGET = int(os.getenv("SUMMARY_TOKEN_BUDGET", "1200"))
+SUMMARY_TAIL_MESSAGES = int(os.getenv("SUMMARY_TAIL_MESSAGES", "4"))  # never folded into the summary
+SUMMARY_MIN_BATCH = int(os.getenv("SUMMARY_MIN_BATCH", "4"))
+SUMMARY_MAX_BATCH = int(os.getenv("SUMMARY_MAX_BATCH", "40"))
+SUMMARY_MODEL = os.getenv("SUMMARY_MODEL", "llama-3.1-8b-instant")
+
+SUMMARY_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """You maintain the running summary of a conversation between a traveller and a trip-planning assistant.
+Merge the new messages into the current summary. Keep every fact planning depends on: origin and destination, dates, number of travellers, budget, preferences and interests, and the flights, hotels and activities that were found, chosen or rejected. Drop greetings and small talk.
+Write plain prose of at most 200 words and answer with the updated summary only."""),
+    ("human", "Current summary:\n{summary}\n\nNew messages:\n{transcript}"),
+])
+
+_llm = None
+
+
+def get_summary_llm():
+    global _llm
+    if _llm is None:
+        _llm = ChatGroq(model=SUMMARY_MODEL, temperature=0, groq_api_key=os.environ.get("GROQ_API_KEY"))
+    return _llm
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token is close enough for budgeting and needs no tokenizer.
+    return len(text) // 4 + 1
+
+
+def history_tokens(messages: List[Dict]) -> int:
+    return sum(estimate_tokens(m["content"]) for m in messages)
+
+
+def compact_history(messages: List[Dict]) -> List[Dict]:
+    """Newest messages whose total stays within SUMMARY_TOKEN_BUDGET; the last one is always kept."""
+    kept, total = [], 0
+    for message in reversed(messages):
+        total += estimate_tokens(message["content"])
+        if kept and total > SUMMARY_TOKEN_BUDGET:
+            break
+        kept.append(message)
+    return list(reversed(kept))
+
+
+def needs_summary(messages: List[Dict], max_messages: int) -> bool:
+    """
+    Whether older turns are being left out of the prompt, i.e. the summary should catch up.
+    messages are the unsummarized ones (get_context() with the conversation's
+    summarized_until_id), so their count is the pending count, capped at max_messages.
+    """
+    # Below this refresh_summary() has no full batch to fold and would do nothing
+    if len(messages) < SUMMARY_MIN_BATCH + SUMMARY_TAIL_MESSAGES:
+        return False
+    return len(messages) >= max_messages or history_tokens(messages) > SUMMARY_TOKEN_BUDGET
+
+
+def summarize(llm, summary: Optional[str], messages: List[ChatMessage]) -> str:
+    transcript = "\n".join(f"{m.role}: {m.content}" for m in messages)
+    result = (SUMMARY_PROMPT | llm).invoke({"summary": summary or "(none yet)", "transcript": transcript})
+    return result.content.strip()
+
+
+def refresh_summary(db: Session, conversation_id: uuid.UUID, llm=None) -> bool:
+    """
+    Folds the oldest unsummarized messages, except the newest SUMMARY_TAIL_MESSAGES, into
+    the conversation's summary. Returns False when there is not enough to fold yet.
+    """
+    conversation = db.get(ChatConversation, conversation_id)
+    if conversation is None:
+        return False
+    summarized_until_id = conversation.summarized_until_id or 0
+    # A full batch plus the tail is enough to know which messages can be folded: if the
+    # query is cut off, the last SUMMARY_TAIL_MESSAGES rows are not the real tail, but the
+    # first SUMMARY_MAX_BATCH rows are older than it either way.
+    pending = db.execute(
+        select(ChatMessage)
+        .where(ChatMessage.conversation_id == conversation_id, ChatMessage.id > summarized_until_id)
+        .order_by(ChatMessage.id)
+        .limit(SUMMARY_MAX_BATCH + SUMMARY_TAIL_MESSAGES)
+    ).scalars().all()
+    pending = pending[:max(len(pending) - SUMMARY_TAIL_MESSAGES, 0)]
+    if len(pending) < SUMMARY_MIN_BATCH:
+        return False
+
+    summary = summarize(llm or get_summary_llm(), conversation.summary, pending)
+    # Guarded on the previous position so a concurrent refresh cannot fold the same messages
+    # twice; last_updated is kept as is so the conversation list order does not change.
+    result = db.execute(
+        update(ChatConversation)
+        .where(ChatConversation.id == conversation_id, ChatConversation.summarized_until_id.is_not_distinct_from(conversation.summarized_until_id))
+        .values(summary=summary, summarized_until_id=pending[-1].id, last_updated=ChatConversation.last_updated)
+    )
+    db.commit()
+    return result.rowcount == 1
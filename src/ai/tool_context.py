@@ -0,0 +1,32 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Callable, Iterator, Optional
+from sqlalchemy.orm import Session
+
+@dataclass(frozen=True)
+class ToolContext:
+    # Tools of one agent step may run concurrently, so each opens its own session
+    # (`with context.session_factory() as db:`) instead of sharing the request's.
+    session_factory: Callable[[], Session]
+    roadmap_id: int
+
+# Each request (asyncio task) sees its own value; langchain copies the context into the
+# executor threads it uses for sync tools, so tools always see the invoking request's value.
+_tool_context: ContextVar[Optional[ToolContext]] = ContextVar("tool_context", default=None)
+
+@contextmanager
+def bind_tool_context(session_factory: Callable[[], Session], roadmap_id: int) -> Iterator[ToolContext]:
+    """Binds the session factory and roadmap the agent's tools should use for one invocation."""
+    context = ToolContext(session_factory=session_factory, roadmap_id=roadmap_id)
+    token = _tool_context.set(context)
+    try:
+        yield context
+    finally:
+        _tool_context.reset(token)
+
+def get_tool_context() -> ToolContext:
+    context = _tool_context.get()
+    if context is None:
+        raise RuntimeError("Agent tools must be invoked inside bind_tool_context()")
+    return context
@@ -1,17 +1,28 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+import os
+from fastapi import FastAPI, Depends, HTTPException, status, Response
 from fastapi.middleware.cors import CORSMiddleware
-from config import init_db, redis_client
+from fastapi.responses import ORJSONResponse
+from config import redis_client
 from routes.auth import router as auth_router
 from routes.chat import router as chat_router
+from routes.roadmap import router as roadmap_router
 from routes.tasks import router as tasks_router
+from routes.debug import router as debug_router
+from routes.notifications import router as notifications_router
 from dotenv import load_dotenv
 from sqlalchemy import text
-from config import get_db
+from config import SessionLocal, engine, async_engine
+from compression import CompressionMiddleware
+from metrics import MetricsMiddleware, instrument_engine, render_metrics
+from tools.flight_providers import close_flight_provider
+from auth_utils import shutdown_hash_pool
 
 
 load_dotenv()
 
-app = FastAPI()
+# orjson only speeds up the final JSON rendering step; FastAPI's response-model
+# validation and encoding before it cost the same as before
+app = FastAPI(default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -20,23 +31,40 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(MetricsMiddleware)
 
-init_db()
+instrument_engine(engine, "sync")
+instrument_engine(async_engine.sync_engine, "async")
 
 app.include_router(auth_router, prefix="/auth", tags=["Auth"])
 app.include_router(chat_router, prefix="/chat", tags=["Chat"])
+app.include_router(roadmap_router, prefix="/roadmaps", tags=["Roadmaps"])
 app.include_router(tasks_router, prefix="/tasks", tags=["Tasks"])
+app.include_router(notifications_router, prefix="/notifications", tags=["Notifications"])
+if os.getenv("DEBUG_ROUTES", "").lower() in ("1", "true", "yes"):
+    app.include_router(debug_router, prefix="/debug", tags=["Debug"])
+
+@app.on_event("shutdown")
+async def shutdown():
+    await close_flight_provider()
+    shutdown_hash_pool()
 
 @app.get("/")
 def root():
     return {"message": "Hello World"}
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus scrape endpoint."""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
 @app.get("/health")
 def health():
     try:
-        db = next(get_db())
-        db.execute(text("SELECT 1"))
-        db.commit()
+        with SessionLocal() as db:
+            db.execute(text("SELECT 1"))
         
         # Test Redis connection
         redis_client.ping()
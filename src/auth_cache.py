@@ -0,0 +1,185 @@
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+
+import redis
+from cachetools import TTLCache
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+import codec
+from config import binary_redis_client, async_binary_redis_client
+from schemas.models import UserInDB
+
+logger = logging.getLogger(__name__)
+
+# Two layers keyed by token subject (email): a small per-process TTL cache in front of a
+# shared Redis entry. Explicit invalidation clears Redis and the local layer of the
+# calling process; other processes catch up within USER_CACHE_LOCAL_TTL seconds.
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+USER_CACHE_LOCAL_TTL = int(os.getenv("USER_CACHE_LOCAL_TTL", "30"))
+USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", "600"))
+
+CACHE_PREFIX = "auth_user"
+
+_local = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_LOCAL_TTL)
+_lock = threading.Lock()  # sync routes run in a threadpool; TTLCache is not thread-safe
+_stats = {"local_hits": 0, "redis_hits": 0, "misses": 0}
+
+
+def _key(email: str) -> str:
+    return f"{CACHE_PREFIX}:{email}"
+
+
+def _count(counter: str):
+    with _lock:
+        _stats[counter] += 1
+
+
+def _snapshot(user: UserInDB) -> Dict:
+    # The password hash is deliberately left out; only login needs it and it reads the DB.
+    return {
+        "id": user.id,
+        "email": user.email,
+        "name": user.name,
+        "type": user.type,
+        "created_at": user.created_at.isoformat() if user.created_at else None,
+    }
+
+
+def _to_user(data: Dict) -> UserInDB:
+    """Builds a detached UserInDB: usable for attribute access and as a FK target, and
+    treated as an existing row (never re-inserted) if it ends up in a session."""
+    user = UserInDB(
+        id=data["id"],
+        email=data["email"],
+        name=data["name"],
+        type=data["type"],
+        created_at=datetime.fromisoformat(data["created_at"]) if data["created_at"] else None,
+    )
+    make_transient_to_detached(user)
+    return user
+
+
+def _local_lookup(email: str) -> Optional[Dict]:
+    with _lock:
+        data = _local.get(email)
+    if data is not None:
+        _count("local_hits")
+    return data
+
+
+def _redis_hit(email: str, raw: Optional[bytes]) -> Optional[Dict]:
+    if not raw:
+        _count("misses")
+        return None
+    data = codec.loads(raw)
+    _count("redis_hits")
+    with _lock:
+        _local[email] = data
+    return data
+
+
+def _lookup(email: str) -> Optional[Dict]:
+    data = _local_lookup(email)
+    if data is not None:
+        return data
+    try:
+        raw = binary_redis_client.get(_key(email))
+    except redis.RedisError as e:
+        logger.warning(f"User cache unavailable: {e}")
+        raw = None
+    return _redis_hit(email, raw)
+
+
+async def _alookup(email: str) -> Optional[Dict]:
+    data = _local_lookup(email)
+    if data is not None:
+        return data
+    try:
+        raw = await async_binary_redis_client.get(_key(email))
+    except redis.RedisError as e:
+        logger.warning(f"User cache unavailable: {e}")
+        raw = None
+    return _redis_hit(email, raw)
+
+
+def _remember_locally(email: str, user: UserInDB) -> Dict:
+    data = _snapshot(user)
+    with _lock:
+        _local[email] = data
+    return data
+
+
+def _remember(email: str, user: UserInDB) -> Dict:
+    data = _remember_locally(email, user)
+    try:
+        binary_redis_client.setex(_key(email), USER_CACHE_TTL, codec.dumps(data))
+    except redis.RedisError:
+        pass
+    return data
+
+
+async def _aremember(email: str, user: UserInDB) -> Dict:
+    data = _remember_locally(email, user)
+    try:
+        await async_binary_redis_client.setex(_key(email), USER_CACHE_TTL, codec.dumps(data))
+    except redis.RedisError:
+        pass
+    return data
+
+
+def get_user_by_email(db: Session, email: str) -> Optional[UserInDB]:
+    """Resolves a token subject to a user, hitting the users table only on a cache miss."""
+    data = _lookup(email)
+    if data is None:
+        user = db.query(UserInDB).filter(UserInDB.email == email).first()
+        if user is None:
+            return None
+        data = _remember(email, user)
+    return _to_user(data)
+
+
+async def aget_user_by_email(db: AsyncSession, email: str) -> Optional[UserInDB]:
+    """Async get_user_by_email(); Redis is read and written with the asyncio client."""
+    data = await _alookup(email)
+    if data is None:
+        user = (await db.execute(select(UserInDB).where(UserInDB.email == email))).scalars().first()
+        if user is None:
+            return None
+        data = await _aremember(email, user)
+    return _to_user(data)
+
+
+def invalidate_user(email: str):
+    """Must be called whenever a user row is changed or deleted."""
+    with _lock:
+        _local.pop(email, None)
+    try:
+        binary_redis_client.delete(_key(email))
+    except redis.RedisError as e:
+        logger.warning(f"Could not invalidate cached user {email}: {e}")
+
+
+def clear_user_cache():
+    with _lock:
+        _local.clear()
+    try:
+        keys = list(binary_redis_client.scan_iter(f"{CACHE_PREFIX}:*"))
+        if keys:
+            binary_redis_client.delete(*keys)
+    except redis.RedisError as e:
+        logger.warning(f"Could not clear cached users: {e}")
+
+
+def get_cache_stats() -> Dict:
+    """Per-process hit counters for the user cache."""
+    with _lock:
+        stats = dict(_stats)
+        stats["local_size"] = len(_local)
+    total = stats["local_hits"] + stats["redis_hits"] + stats["misses"]
+    stats["hit_ratio"] = (stats["local_hits"] + stats["redis_hits"]) / total if total else 0.0
+    return stats
@@ -0,0 +1,82 @@
+"""
+Per-request overhead of AIAgent.chat with a fake LLM (no network), comparing the
+executor built per request (previous behaviour, verbose tracing on) with the shared one.
+
+Run from src/:  python -m benchmarks.bench_agent_overhead
+(needs POSTGRES_URL set like the app, no database connection is made)
+"""
+import asyncio
+import contextlib
+import io
+import itertools
+import time
+
+from langchain.agents import AgentExecutor, create_tool_calling_agent
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from ai.agent import AIAgent, ChatRequest, Message
+from ai.tool_context import bind_tool_context
+
+REQUESTS = 200
+
+
+class FakeToolCallingModel(GenericFakeChatModel):
+    """Always answers with plain text; bind_tools() converts schemas like ChatGroq does."""
+
+    def bind_tools(self, tools, **kwargs):
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], **kwargs)
+
+
+def make_llm():
+    return FakeToolCallingModel(messages=itertools.repeat(AIMessage(content="Where would you like to go?")))
+
+
+def make_request():
+    return ChatRequest(
+        messages=[
+            Message(role="user", content="Hi, I want to plan a trip"),
+            Message(role="assistant", content="Sure! Where from?"),
+            Message(role="user", content="From Almaty, in July"),
+        ],
+        roadmap_id=1,
+    )
+
+
+async def per_request_executor(agent: AIAgent, request: ChatRequest):
+    # What AIAgent.chat used to do on every call.
+    executor = AgentExecutor(
+        agent=create_tool_calling_agent(agent.llm, agent.tools, agent.prompt),
+        tools=agent.tools,
+        verbose=True,
+        return_intermediate_steps=True,
+    )
+    with bind_tool_context(None, request.roadmap_id):
+        await executor.ainvoke({
+            "input": request.messages[-1].content,
+            "chat_history": [HumanMessage(content=m.content) if m.role == "user" else AIMessage(content=m.content) for m in request.messages[:-1]],
+        })
+
+
+async def measure(label: str, run):
+    with contextlib.redirect_stdout(io.StringIO()):
+        await run()  # warm up
+        start = time.perf_counter()
+        for _ in range(REQUESTS):
+            await run()
+        elapsed = (time.perf_counter() - start) / REQUESTS
+    print(f"{label:<28} {elapsed * 1000:8.3f} ms/request")
+    return elapsed
+
+
+async def main():
+    agent = AIAgent(llm=make_llm())
+    request = make_request()
+    before = await measure("executor built per request", lambda: per_request_executor(agent, request))
+    after = await measure("shared executor", lambda: agent.chat(request, session_factory=None))
+    print(f"overhead saved: {(before - after) * 1000:.3f} ms/request ({before / after:.2f}x)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,60 @@
+"""
+Encode/decode time and stored bytes for flight-search cache entries: json (the previous
+cache format), str() with ast.literal_eval (how process_data stored its result) and the
+shared codec, uncompressed and zstd-compressed. The synthetic payloads repeat more than
+real SerpAPI responses, so expect real compression ratios to be lower.
+
+Run from src/:  python -m benchmarks.bench_codec
+"""
+import ast
+import json
+import time
+import timeit
+
+import codec
+from tools.flight_providers import build_stub_results
+
+PARAMS = {"departure_id": "AKX", "arrival_id": "NQZ", "outbound_date": "2025-07-01", "return_date": "2025-07-08", "currency": "KZT"}
+
+
+def plain_codec_dumps(obj) -> bytes:
+    threshold = codec.CODEC_COMPRESS_THRESHOLD
+    codec.CODEC_COMPRESS_THRESHOLD = float("inf")
+    try:
+        return codec.dumps(obj)
+    finally:
+        codec.CODEC_COMPRESS_THRESHOLD = threshold
+
+
+FORMATS = (
+    ("json", lambda o: json.dumps(o).encode(), lambda b: json.loads(b)),
+    ("str() + literal_eval", lambda o: str(o).encode(), lambda b: ast.literal_eval(b.decode())),
+    ("codec, uncompressed", plain_codec_dumps, codec.loads),
+    ("codec", codec.dumps, codec.loads),
+)
+
+
+def per_call(func, arg) -> float:
+    number, total = timeit.Timer(lambda: func(arg)).autorange()
+    return total / number
+
+
+def main():
+    print(f"compression threshold: {codec.CODEC_COMPRESS_THRESHOLD} bytes, zstd level {codec.CODEC_COMPRESS_LEVEL}")
+    for size in (10, 40, 200):
+        entry = {"fetched_at": time.time(), "results": build_stub_results(PARAMS, num_options=size, seed=42)}
+        print(f"\n{size} options")
+        baseline = None
+        for label, dumps, loads in FORMATS:
+            data = dumps(entry)
+            assert loads(data) == entry
+            encode, decode = per_call(dumps, entry), per_call(loads, data)
+            baseline = baseline or len(data)
+            print(
+                f"  {label:<22} {len(data):>8} bytes ({len(data) / baseline:5.2f}x) | "
+                f"encode {encode * 1e6:8.1f} us | decode {decode * 1e6:8.1f} us"
+            )
+
+
+if __name__ == "__main__":
+    main()
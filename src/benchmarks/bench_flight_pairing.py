@@ -0,0 +1,52 @@
+"""
+Micro-benchmark for outbound/return pairing on synthetic SerpAPI-shaped payloads.
+
+Run from src/:  python -m benchmarks.bench_flight_pairing
+"""
+import timeit
+
+from tools.flight_pairing import pair_flights, split_by_direction, _build_segment, _pair_price
+from tools.flight_providers import build_stub_results
+
+START_DATE = "2025-07-01"
+END_DATE = "2025-07-08"
+PARAMS = {"departure_id": "AKX", "arrival_id": "NQZ", "outbound_date": START_DATE, "return_date": END_DATE, "currency": "KZT"}
+
+
+def nested_loop_pairing(results: dict, flights_list: list, limit: int = 8) -> list:
+    """The previous approach: build every matching pair, then slice."""
+    outbound, returns = split_by_direction(flights_list, START_DATE, END_DATE)
+    paired = []
+    for out_opt, out_seg in outbound:
+        for ret_opt, ret_seg in returns:
+            if out_seg['arrival_airport']['id'] == ret_seg['departure_airport']['id']:
+                paired.append({
+                    "segments": [_build_segment(out_opt, out_seg, 'outbound'), _build_segment(ret_opt, ret_seg, 'return')],
+                    "price": _pair_price(out_opt, ret_opt),
+                    "currency": results.get('search_parameters', {}).get('currency', 'Unknown'),
+                    "type": out_opt.get('type', 'Unknown'),
+                    "buy_url": out_opt.get('link') or ret_opt.get('link') or "Not available",
+                    "num_stops": 0,
+                    "stop_airports": []
+                })
+    paired.sort(key=lambda f: f["price"])  # ranked, to compare like with like
+    return paired[:limit]
+
+
+def main():
+    for size in (20, 200, 2000):
+        results = build_stub_results(PARAMS, num_options=size, seed=42)
+        flights = results["best_flights"]
+
+        expected = [f["price"] for f in nested_loop_pairing(results, flights)]
+        actual = [f["price"] for f in pair_flights(results, flights, START_DATE, END_DATE)]
+        assert expected == actual, (expected, actual)
+
+        number = max(1, 2000 // size)
+        nested = timeit.timeit(lambda: nested_loop_pairing(results, flights), number=number) / number
+        heap = timeit.timeit(lambda: pair_flights(results, flights, START_DATE, END_DATE), number=number) / number
+        print(f"{size:>5} options: nested loop {nested * 1000:9.3f} ms | heap top-8 {heap * 1000:7.3f} ms | {nested / heap:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
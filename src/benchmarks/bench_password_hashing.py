@@ -0,0 +1,65 @@
+"""
+Login throughput at increasing concurrency: bcrypt verification in starlette's threadpool
+(how the sync /auth/login handler ran) versus the dedicated process pool. Also reports
+the worst event-loop lag observed meanwhile, i.e. how long other requests would wait.
+
+Run from src/:  python -m benchmarks.bench_password_hashing
+"""
+import asyncio
+import time
+
+from starlette.concurrency import run_in_threadpool
+
+from auth_utils import hash_password, verify_password, verify_password_async, get_hash_pool, PASSWORD_HASH_WORKERS
+
+LOGINS_PER_LEVEL = 64
+CONCURRENCY_LEVELS = (1, 4, 16, 64)
+
+
+async def threadpool_login(password: str, hashed: str) -> bool:
+    return await run_in_threadpool(verify_password, password, hashed)
+
+
+async def process_pool_login(password: str, hashed: str) -> bool:
+    return await verify_password_async(password, hashed)
+
+
+async def run_level(login, concurrency: int, hashed: str):
+    semaphore = asyncio.Semaphore(concurrency)
+    max_lag = 0.0
+    done = asyncio.Event()
+
+    async def ticker():
+        nonlocal max_lag
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.005)
+            max_lag = max(max_lag, time.perf_counter() - start - 0.005)
+
+    async def one():
+        async with semaphore:
+            assert await login("secret-password", hashed)
+
+    tick = asyncio.create_task(ticker())
+    start = time.perf_counter()
+    await asyncio.gather(*[one() for _ in range(LOGINS_PER_LEVEL)])
+    elapsed = time.perf_counter() - start
+    done.set()
+    await tick
+    return LOGINS_PER_LEVEL / elapsed, max_lag
+
+
+async def main():
+    hashed = hash_password("secret-password")
+    # Spawn and warm up every worker before measuring
+    await asyncio.gather(*[process_pool_login("secret-password", hashed) for _ in range(PASSWORD_HASH_WORKERS * 2)])
+    print(f"process pool workers: {PASSWORD_HASH_WORKERS}, logins per level: {LOGINS_PER_LEVEL}")
+    for concurrency in CONCURRENCY_LEVELS:
+        for label, login in (("threadpool", threadpool_login), ("process pool", process_pool_login)):
+            rate, lag = await run_level(login, concurrency, hashed)
+            print(f"concurrency {concurrency:>3} | {label:<12} {rate:7.1f} logins/s | max loop lag {lag * 1000:6.1f} ms")
+    get_hash_pool().shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,70 @@
+"""
+Render time and wire size of realistic /chat/ and /chat/conversation/{id} responses:
+FastAPI's default JSONResponse versus ORJSONResponse, each uncompressed and gzipped at
+the level CompressionMiddleware uses. Only the final rendering step is timed: the
+content is already plain JSON data, so FastAPI's response-model validation and encoding
+(serialize_response), which ORJSONResponse does not change, are left out.
+
+Run from src/:  python -m benchmarks.bench_responses
+(needs POSTGRES_URL and GROQ_API_KEY set like the app, no connection is made)
+"""
+import gzip
+import timeit
+import uuid
+from datetime import datetime, timedelta
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from compression import GZIP_LEVEL
+from routes.chat import ChatApiResponse
+from schemas.models import ChatConversationSchema, ChatMessageSchema
+from tools.flight_pairing import pair_flights
+from tools.flight_providers import build_stub_results
+
+PARAMS = {"departure_id": "AKX", "arrival_id": "NQZ", "outbound_date": "2025-07-01", "return_date": "2025-07-08", "currency": "KZT"}
+
+
+def chat_response() -> dict:
+    results = build_stub_results(PARAMS, num_options=40, seed=42)
+    flights = pair_flights(results, results["best_flights"], PARAMS["outbound_date"], PARAMS["return_date"])
+    reply = "Here are the best round trips I found from Almaty to Astana for your dates. " * 4
+    return ChatApiResponse(response=reply, conversation_id=str(uuid.uuid4()), tool_output=flights).model_dump(mode="json")
+
+
+def conversation_response(turns: int) -> dict:
+    start = datetime(2025, 6, 1, 12, 0)
+    messages = []
+    for i in range(turns * 2):
+        role = "user" if i % 2 == 0 else "assistant"
+        content = "I would like to fly from Almaty in July, ideally a morning flight." if role == "user" else (
+            "Sure! I found several options; the cheapest leaves at 08:00 and arrives at 10:05, "
+            "and I saved it to your roadmap together with a comfortable hotel near the centre. " * 2
+        )
+        messages.append(ChatMessageSchema(id=i + 1, role=role, content=content, timestamp=start + timedelta(minutes=i)))
+    conversation = ChatConversationSchema(
+        id=uuid.uuid4(), user_id=1, created_at=start, last_updated=messages[-1].timestamp, messages=messages,
+    )
+    return conversation.model_dump(mode="json")
+
+
+def report(label: str, content: dict):
+    print(label)
+    for name, response_class in (("JSONResponse", JSONResponse), ("ORJSONResponse", ORJSONResponse)):
+        number, total = timeit.Timer(lambda: response_class(content)).autorange()
+        body = response_class(content).body
+        gzipped = gzip.compress(body, compresslevel=GZIP_LEVEL)
+        number_gz, total_gz = timeit.Timer(lambda: gzip.compress(body, compresslevel=GZIP_LEVEL)).autorange()
+        print(
+            f"  {name:<15} render {total / number * 1e6:8.1f} us | {len(body):>7} bytes, "
+            f"gzip {len(gzipped):>6} bytes ({len(gzipped) / len(body):4.0%}) in {total_gz / number_gz * 1e6:7.1f} us"
+        )
+
+
+def main():
+    report("/chat/ with 8 paired flights", chat_response())
+    for turns in (10, 100):
+        report(f"/chat/conversation/{{id}} with {turns * 2} messages", conversation_response(turns))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,10 @@
 from celery import Celery
 import os
 from dotenv import load_dotenv
+from codec import register_kombu_serializer, SERIALIZER_NAME
 
 load_dotenv()
+register_kombu_serializer()
 
 # Celery configuration
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
@@ -17,12 +19,16 @@ celery_app = Celery(
 
 # Celery configuration
 celery_app.conf.update(
-    task_serializer="json",
-    accept_content=["json"],
-    result_serializer="json",
+    # Tasks and results use the shared codec (codec.py); json is still accepted so
+    # messages queued by a previous release are consumed during a rolling deploy.
+    task_serializer=SERIALIZER_NAME,
+    accept_content=[SERIALIZER_NAME, "json"],
+    result_serializer=SERIALIZER_NAME,
     timezone="UTC",
     enable_utc=True,
     result_expires=3600,
+    # Report STARTED too, so status lookups and /tasks/stream see a task leave the queue
+    task_track_started=True,
 )
 
 if __name__ == "__main__":
@@ -1,7 +1,17 @@
 from celery_app import celery_app
-from config import redis_client
+from config import redis_client, binary_redis_client, SessionLocal, close_async_redis
+from ai.summarizer import refresh_summary
+from notifications import push_notification
+from tools.ticket_parser import find_tickets
+from tools.flight_providers import close_flight_provider
+from tools.hotel_parser import find_hotels
+from tools.activity_parser import find_activities
+from typing import List
+import asyncio
+import codec
 import time
 import logging
+import uuid
 
 logger = logging.getLogger(__name__)
 
@@ -32,20 +42,68 @@ def process_data(data: dict) -> dict:
     }
     
     # Store in Redis cache if needed
-    redis_client.setex(f"processed_data_{data.get('id', 'unknown')}", 3600, str(processed_data))
+    binary_redis_client.setex(f"processed_data_{data.get('id', 'unknown')}", 3600, codec.dumps(processed_data))
     
     logger.info("Data processing completed")
     return processed_data
 
 @celery_app.task
 def send_notification(user_id: str, message: str) -> bool:
-    """Example task for sending notifications."""
+    """Adds a notification to the user's inbox (see notifications.py)."""
     logger.info(f"Sending notification to user {user_id}: {message}")
     
     # Here you would integrate with your notification service
-    # For now, we'll just log it and store in Redis
-    notification_key = f"notification_{user_id}_{time.time()}"
-    redis_client.setex(notification_key, 86400, message)  # Store for 24 hours
+    push_notification(user_id, message)
     
     logger.info(f"Notification sent to user {user_id}")
-    return True 
\ No newline at end of file
+    return True
+
+@celery_app.task
+def summarize_conversation(conversation_id: str) -> bool:
+    """Folds older turns of a conversation into its summary; one run per conversation at a time."""
+    lock_key = f"chat_summary_lock:{conversation_id}"
+    if not redis_client.set(lock_key, "1", nx=True, ex=300):
+        return False
+    try:
+        with SessionLocal() as db:
+            return refresh_summary(db, uuid.UUID(conversation_id))
+    finally:
+        redis_client.delete(lock_key)
+
+def _run_async(coro):
+    """asyncio.run() for task bodies. The flight provider's HTTP client and the asyncio
+    Redis connections belong to the loop they were opened on, so they are closed before
+    the loop is, instead of leaking their pools."""
+    async def run():
+        try:
+            return await coro
+        finally:
+            await close_flight_provider()
+            await close_async_redis()
+    return asyncio.run(run())
+
+# Roadmap searches. They are started together as a chord (see routes/tasks.py), so the
+# three providers are queried in parallel on workers; each task reports PROGRESS state.
+
+@celery_app.task(bind=True)
+def search_tickets(self, roadmap_id: int, departure_id: str, destination_id: str, start_date: str, end_date: str):
+    self.update_state(state="PROGRESS", meta={"search": "tickets", "stage": "searching"})
+    with SessionLocal() as db:
+        return _run_async(find_tickets(db, roadmap_id, departure_id, destination_id, start_date, end_date, background_refresh=False))
+
+@celery_app.task(bind=True)
+def search_hotels(self, roadmap_id: int, destination: str, check_in_date: str, check_out_date: str, preference: str) -> str:
+    self.update_state(state="PROGRESS", meta={"search": "hotels", "stage": "searching"})
+    with SessionLocal() as db:
+        return find_hotels(db, roadmap_id, destination, check_in_date, check_out_date, preference)
+
+@celery_app.task(bind=True)
+def search_activities(self, roadmap_id: int, destination: str, interests: List[str]) -> str:
+    self.update_state(state="PROGRESS", meta={"search": "activities", "stage": "searching"})
+    with SessionLocal() as db:
+        return find_activities(db, roadmap_id, destination, interests)
+
+@celery_app.task
+def collect_search_results(results: list, searches: List[str]) -> dict:
+    """Chord callback: maps each search name to its result, in the order they were started."""
+    return dict(zip(searches, results))
@@ -0,0 +1,72 @@
+import os
+import threading
+from decimal import Decimal
+from typing import Any, Union
+
+import orjson
+import zstandard
+
+# Shared serialization for everything the app stores in Redis (cache entries, Celery
+# messages and results): orjson, zstd-compressed once the encoded value reaches
+# CODEC_COMPRESS_THRESHOLD bytes. A one-byte header tells the two forms apart.
+CODEC_COMPRESS_THRESHOLD = int(os.getenv("CODEC_COMPRESS_THRESHOLD", "1024"))
+CODEC_COMPRESS_LEVEL = int(os.getenv("CODEC_COMPRESS_LEVEL", "3"))
+
+SERIALIZER_NAME = "orjson-zstd"
+CONTENT_TYPE = "application/x-orjson-zstd"
+
+_PLAIN = b"j"
+_COMPRESSED = b"z"
+
+# zstd (de)compressor objects must not be shared between threads
+_zstd = threading.local()
+
+
+def _compressor() -> zstandard.ZstdCompressor:
+    if not hasattr(_zstd, "compressor"):
+        _zstd.compressor = zstandard.ZstdCompressor(level=CODEC_COMPRESS_LEVEL)
+    return _zstd.compressor
+
+
+def _decompressor() -> zstandard.ZstdDecompressor:
+    if not hasattr(_zstd, "decompressor"):
+        _zstd.decompressor = zstandard.ZstdDecompressor()
+    return _zstd.decompressor
+
+
+def _default(obj: Any) -> Any:
+    # Types kombu's json serializer handled that orjson does not (datetime, UUID and
+    # dataclasses are native to orjson).
+    if isinstance(obj, Decimal):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, bytes):
+        return obj.decode("utf-8")
+    raise TypeError(f"Type is not serializable: {type(obj).__name__}")
+
+
+def dumps(obj: Any) -> bytes:
+    data = orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    if len(data) >= CODEC_COMPRESS_THRESHOLD:
+        return _COMPRESSED + _compressor().compress(data)
+    return _PLAIN + data
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Decodes dumps() output; plain JSON (entries written before the codec) is accepted too."""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    header, body = data[:1], data[1:]
+    if header == _COMPRESSED:
+        return orjson.loads(_decompressor().decompress(body))
+    if header == _PLAIN:
+        return orjson.loads(body)
+    return orjson.loads(data)
+
+
+def register_kombu_serializer():
+    """Makes the codec available to Celery as SERIALIZER_NAME."""
+    from kombu.serialization import register
+
+    register(SERIALIZER_NAME, dumps, loads, content_type=CONTENT_TYPE, content_encoding="binary")
@@ -0,0 +1,36 @@
+import os
+
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware, GZipResponder
+from starlette.types import Message, Receive, Scope, Send
+
+# Responses of at least GZIP_MINIMUM_SIZE bytes are gzipped for clients that accept it.
+# Level 5 compresses flight and conversation JSON nearly as well as 9 at a fraction of the CPU.
+GZIP_MINIMUM_SIZE = int(os.getenv("GZIP_MINIMUM_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "5"))
+
+# gzip buffers its output, which would hold back server-sent events
+UNCOMPRESSED_CONTENT_TYPES = ("text/event-stream",)
+
+
+class _Responder(GZipResponder):
+    async def send_with_gzip(self, message: Message) -> None:
+        await super().send_with_gzip(message)
+        if message["type"] == "http.response.start":
+            content_type = Headers(raw=message["headers"]).get("content-type", "")
+            if content_type.startswith(UNCOMPRESSED_CONTENT_TYPES):
+                # Same path as an already encoded body: messages are passed through as-is
+                self.content_encoding_set = True
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """GZipMiddleware that leaves event streams alone."""
+
+    def __init__(self, app, minimum_size: int = GZIP_MINIMUM_SIZE, compresslevel: int = GZIP_LEVEL):
+        super().__init__(app, minimum_size=minimum_size, compresslevel=compresslevel)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and "gzip" in Headers(scope=scope).get("Accept-Encoding", ""):
+            await _Responder(self.app, self.minimum_size, compresslevel=self.compresslevel)(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
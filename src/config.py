@@ -1,22 +1,53 @@
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 import os
 from dotenv import load_dotenv
-from typing import Generator
+from typing import Generator, AsyncGenerator
 from schemas.models import Base
+from db_pool import InstrumentedQueuePool, InstrumentedAsyncQueuePool, pool_options
 import redis
+import redis.asyncio
 
 load_dotenv()
 
 POSTGRES_URL = os.getenv("POSTGRES_URL")
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 
+def _async_database_url(url: str) -> str:
+    """postgresql+psycopg2://... -> postgresql+asyncpg://..."""
+    scheme, rest = url.split("://", 1)
+    return f"{scheme.split('+')[0]}+asyncpg://{rest}"
+
+ASYNC_POSTGRES_URL = os.getenv("ASYNC_POSTGRES_URL") or _async_database_url(POSTGRES_URL)
+
+# Flight search cache: entries are fresh for FLIGHT_CACHE_TTL seconds and may be
+# served stale (while a refresh runs) for another FLIGHT_CACHE_STALE_TTL seconds.
+FLIGHT_CACHE_TTL = int(os.getenv("FLIGHT_CACHE_TTL", "900"))
+FLIGHT_CACHE_STALE_TTL = int(os.getenv("FLIGHT_CACHE_STALE_TTL", "3600"))
+
 # Database setup
-engine = create_engine(POSTGRES_URL)
+engine = create_engine(POSTGRES_URL, poolclass=InstrumentedQueuePool, **pool_options())
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for async def routes, so DB waits do not block the event loop.
+# expire_on_commit=False: expired attributes cannot be lazily refreshed under asyncio.
+async_engine = create_async_engine(ASYNC_POSTGRES_URL, poolclass=InstrumentedAsyncQueuePool, **pool_options())
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # Redis setup
 redis_client = redis.from_url(REDIS_URL, decode_responses=True)
+# For values written with codec.dumps(): they are bytes and must not be decoded as text.
+binary_redis_client = redis.from_url(REDIS_URL)
+# asyncio counterparts for the request hot paths, so cache round trips do not block the
+# event loop. Their connections belong to the loop that opened them: code that runs
+# them under a short-lived loop calls close_async_redis() before the loop ends.
+async_redis_client = redis.asyncio.from_url(REDIS_URL, decode_responses=True)
+async_binary_redis_client = redis.asyncio.from_url(REDIS_URL)
+
+async def close_async_redis():
+    for client in (async_redis_client, async_binary_redis_client):
+        await client.connection_pool.disconnect()
 
 print("Connecting to:", POSTGRES_URL)
 
@@ -27,12 +58,24 @@ def get_db() -> Generator:
     finally:
         db.close()
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def _alembic_config():
+    from alembic.config import Config
+    return Config(os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini"))
+
 def init_db():
-    print("Initializing the database...")
-    Base.metadata.create_all(bind=engine)
+    """Brings the schema up to date; same as `alembic upgrade head` from src/."""
+    from alembic import command
+    print("Migrating the database...")
+    command.upgrade(_alembic_config(), "head")
 
 def reset_db():
+    from alembic import command
     print("Dropping all tables...")
     Base.metadata.drop_all(bind=engine)
+    command.stamp(_alembic_config(), "base")
     print("Recreating all tables...")
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    command.upgrade(_alembic_config(), "head")
\ No newline at end of file
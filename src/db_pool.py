@@ -0,0 +1,119 @@
+import os
+import threading
+import time
+from typing import Dict
+
+from sqlalchemy import exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Connection pool settings, per engine and per process. Each API worker has a sync and an
+# async engine, so its worst case is 2 * (DB_POOL_SIZE + DB_MAX_OVERFLOW) connections.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+
+def pool_options() -> Dict:
+    """Keyword arguments for create_engine / create_async_engine."""
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+class PoolStats:
+    """Counters for one engine's pool; they survive pool.recreate() (engine.dispose())."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.connects = 0
+        self.waits = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.timeouts = 0
+
+    def record_checkout(self, waited: bool, seconds: float):
+        with self._lock:
+            self.checkouts += 1
+            if waited:
+                self.waits += 1
+                self.wait_seconds_total += seconds
+                self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+    def record_timeout(self, seconds: float):
+        with self._lock:
+            self.waits += 1
+            self.timeouts += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+    def record_connect(self):
+        with self._lock:
+            self.connects += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "connects": self.connects,
+                "waits": self.waits,
+                "wait_seconds_total": self.wait_seconds_total,
+                "wait_seconds_max": self.wait_seconds_max,
+                "timeouts": self.timeouts,
+            }
+
+
+POOL_STATS = {"sync": PoolStats(), "async": PoolStats()}
+
+
+class _InstrumentedPoolMixin:
+    stats_label = None
+
+    @property
+    def stats(self) -> PoolStats:
+        return POOL_STATS[self.stats_label]
+
+    def _do_get(self):
+        # A checkout waits only when every pooled and overflow connection is in use.
+        exhausted = self.checkedin() == 0 and self._max_overflow > -1 and self.overflow() >= self._max_overflow
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.record_timeout(time.perf_counter() - start)
+            raise
+        self.stats.record_checkout(exhausted, time.perf_counter() - start)
+        return connection
+
+    def _create_connection(self):
+        self.stats.record_connect()
+        return super()._create_connection()
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    stats_label = "sync"
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    stats_label = "async"
+
+
+def pool_status(engine: Engine) -> Dict:
+    """Live gauges plus cumulative counters for an engine using an instrumented pool."""
+    pool = engine.pool
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": pool._max_overflow,
+        "timeout": pool.timeout(),
+        **pool.stats.snapshot(),
+    }
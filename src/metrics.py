@@ -0,0 +1,146 @@
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Prometheus metrics of this process, scraped from GET /metrics. With several uvicorn
+# workers each one reports its own series, so scrape every worker (or run one per pod).
+
+# LLM and tool calls take seconds, not milliseconds
+SLOW_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "HTTP request latency, until the response body is sent",
+    ["method", "route", "status"], buckets=SLOW_BUCKETS,
+)
+LLM_CALL_SECONDS = Histogram("llm_call_duration_seconds", "Chat model call latency", ["model", "status"], buckets=SLOW_BUCKETS)
+TOOL_CALL_SECONDS = Histogram("agent_tool_duration_seconds", "Agent tool call latency", ["tool", "status"], buckets=SLOW_BUCKETS)
+DB_QUERY_SECONDS = Histogram("db_query_duration_seconds", "SQL statement latency", ["engine"])
+DB_QUERIES = Counter("db_queries_total", "SQL statements executed", ["engine"])
+REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries", "SQL statements per HTTP request", ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89),
+)
+REQUEST_DB_SECONDS = Histogram("http_request_db_seconds", "Time spent in SQL per HTTP request", ["route"])
+
+
+class _RequestDbUsage:
+    __slots__ = ("queries", "seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+
+# Set by MetricsMiddleware for the duration of a request. Threadpool calls, agent tool
+# threads and SQLAlchemy's async greenlets all run with a copy of the request's context.
+_request_db: ContextVar[Optional[_RequestDbUsage]] = ContextVar("request_db", default=None)
+
+
+def _route_label(scope: Dict) -> str:
+    # The route template, not the raw path, so ids do not explode label cardinality
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware (no BaseHTTPMiddleware), so streamed responses are not buffered."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = 500
+        usage = _RequestDbUsage()
+        token = _request_db.set(usage)
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _request_db.reset(token)
+            route = _route_label(scope)
+            HTTP_REQUEST_SECONDS.labels(scope["method"], route, str(status)).observe(elapsed)
+            REQUEST_DB_QUERIES.labels(route).observe(usage.queries)
+            REQUEST_DB_SECONDS.labels(route).observe(usage.seconds)
+
+
+def instrument_engine(engine: Engine, label: str):
+    """Times every statement run on `engine` (for an AsyncEngine pass engine.sync_engine)."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        DB_QUERIES.labels(label).inc()
+        DB_QUERY_SECONDS.labels(label).observe(elapsed)
+        usage = _request_db.get()
+        if usage is not None:
+            usage.queries += 1
+            usage.seconds += elapsed
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        # after_cursor_execute does not run for failed statements
+        starts = exception_context.connection.info.get("query_start") if exception_context.connection else None
+        if starts:
+            starts.pop()
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """Times chat model and tool runs; pass it in the run config so child runs inherit it."""
+
+    run_inline = True  # only records timestamps, no need for an executor hop
+
+    def __init__(self):
+        self._starts: Dict[UUID, tuple] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, metadata: Optional[Dict] = None, **kwargs: Any):
+        model = (metadata or {}).get("ls_model_name") or "unknown"
+        self._starts[run_id] = (model, time.perf_counter())
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs: Any):
+        self._finish(run_id, LLM_CALL_SECONDS, "ok")
+
+    def on_llm_error(self, error, *, run_id: UUID, **kwargs: Any):
+        self._finish(run_id, LLM_CALL_SECONDS, "error")
+
+    def on_tool_start(self, serialized, input_str, *, run_id: UUID, **kwargs: Any):
+        self._starts[run_id] = ((serialized or {}).get("name") or "unknown", time.perf_counter())
+
+    def on_tool_end(self, output, *, run_id: UUID, **kwargs: Any):
+        self._finish(run_id, TOOL_CALL_SECONDS, "ok")
+
+    def on_tool_error(self, error, *, run_id: UUID, **kwargs: Any):
+        self._finish(run_id, TOOL_CALL_SECONDS, "error")
+
+    def _finish(self, run_id: UUID, histogram: Histogram, status: str):
+        started = self._starts.pop(run_id, None)
+        if started is not None:
+            name, start = started
+            histogram.labels(name, status).observe(time.perf_counter() - start)
+
+
+metrics_callback = MetricsCallbackHandler()
+
+
+def render_metrics():
+    return generate_latest(), CONTENT_TYPE_LATEST
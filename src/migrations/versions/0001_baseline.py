@@ -0,0 +1,156 @@
+"""Baseline: the schema init_db() used to create with Base.metadata.create_all
+
+Databases created by init_db() already have these tables, so each one is created only
+if it is missing; upgrading such a database simply records this revision.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import context, op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _create_table(name, *columns, indexes=()):
+    if not context.is_offline_mode() and sa.inspect(op.get_bind()).has_table(name):
+        return
+    op.create_table(name, *columns)
+    for index_name, index_columns, unique in indexes:
+        op.create_index(index_name, name, index_columns, unique=unique)
+
+
+def upgrade():
+    _create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("hashed_password", sa.String(), nullable=False),
+        sa.Column("type", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime()),
+        indexes=[("ix_users_id", ["id"], False), ("ix_users_email", ["email"], True)],
+    )
+    _create_table(
+        "roadmaps",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+        sa.Column("title", sa.String(), nullable=False),
+        sa.Column("destination", sa.String(), nullable=False),
+        sa.Column("start_date", sa.Date()),
+        sa.Column("end_date", sa.Date()),
+        sa.Column("budget_total", sa.Integer()),
+        sa.Column("created_at", sa.DateTime()),
+        indexes=[("ix_roadmaps_id", ["id"], False)],
+    )
+    _create_table(
+        "roadmap_days",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("roadmap_id", sa.Integer(), sa.ForeignKey("roadmaps.id")),
+        sa.Column("day_index", sa.Integer()),
+        sa.Column("date", sa.Date()),
+        sa.Column("summary", sa.Text()),
+        indexes=[("ix_roadmap_days_id", ["id"], False)],
+    )
+    _create_table(
+        "roadmap_tasks",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("roadmap_day_id", sa.Integer(), sa.ForeignKey("roadmap_days.id")),
+        sa.Column("type", sa.String()),
+        sa.Column("title", sa.String()),
+        sa.Column("description", sa.Text()),
+        sa.Column("start_time", sa.Time()),
+        sa.Column("end_time", sa.Time()),
+        sa.Column("linked_id", sa.Integer()),
+        sa.Column("link_type", sa.String()),
+        indexes=[("ix_roadmap_tasks_id", ["id"], False)],
+    )
+    _create_table(
+        "tickets",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("roadmap_id", sa.Integer(), sa.ForeignKey("roadmaps.id")),
+        sa.Column("type", sa.String()),
+        sa.Column("from", sa.String()),
+        sa.Column("to", sa.String()),
+        sa.Column("departure", sa.DateTime()),
+        sa.Column("arrival", sa.DateTime()),
+        sa.Column("price", sa.Integer()),
+        sa.Column("provider_url", sa.String()),
+        indexes=[("ix_tickets_id", ["id"], False)],
+    )
+    _create_table(
+        "accommodations",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("roadmap_id", sa.Integer(), sa.ForeignKey("roadmaps.id")),
+        sa.Column("name", sa.String()),
+        sa.Column("check_in", sa.DateTime()),
+        sa.Column("check_out", sa.DateTime()),
+        sa.Column("price_total", sa.Integer()),
+        sa.Column("location", sa.String()),
+        sa.Column("provider_url", sa.String()),
+        indexes=[("ix_accommodations_id", ["id"], False)],
+    )
+    _create_table(
+        "places",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("roadmap_id", sa.Integer(), sa.ForeignKey("roadmaps.id")),
+        sa.Column("name", sa.String()),
+        sa.Column("category", sa.String()),
+        sa.Column("location", sa.String()),
+        sa.Column("duration_min", sa.Integer()),
+        sa.Column("rating", sa.Float()),
+        sa.Column("url", sa.String()),
+        indexes=[("ix_places_id", ["id"], False)],
+    )
+    _create_table(
+        "food_places",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("roadmap_id", sa.Integer(), sa.ForeignKey("roadmaps.id")),
+        sa.Column("name", sa.String()),
+        sa.Column("category", sa.String()),
+        sa.Column("location", sa.String()),
+        sa.Column("avg_price", sa.Integer()),
+        sa.Column("rating", sa.Float()),
+        sa.Column("url", sa.String()),
+        indexes=[("ix_food_places_id", ["id"], False)],
+    )
+    _create_table(
+        "user_preferences",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+        sa.Column("food_type", postgresql.ARRAY(sa.String())),
+        sa.Column("interests", postgresql.ARRAY(sa.String())),
+        sa.Column("daily_budget", sa.Integer()),
+        sa.Column("accommodation_type", sa.String()),
+        sa.Column("walking_or_guided", sa.String()),
+        indexes=[("ix_user_preferences_id", ["id"], False)],
+    )
+    _create_table(
+        "chat_conversations",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("last_updated", sa.DateTime()),
+    )
+    _create_table(
+        "chat_messages",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("conversation_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("chat_conversations.id"), nullable=False),
+        sa.Column("role", sa.String(), nullable=False),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("timestamp", sa.DateTime()),
+        indexes=[("ix_chat_messages_id", ["id"], False)],
+    )
+
+
+def downgrade():
+    for table in (
+        "chat_messages", "chat_conversations", "user_preferences", "food_places", "places",
+        "accommodations", "tickets", "roadmap_tasks", "roadmap_days", "roadmaps", "users",
+    ):
+        op.drop_table(table)
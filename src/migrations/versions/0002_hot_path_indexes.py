@@ -0,0 +1,43 @@
+"""Indexes on foreign keys and the composite indexes of the chat queries
+
+Built with CREATE INDEX CONCURRENTLY, outside the migration transaction, so writes to
+the tables keep going while the indexes build. If a concurrent build fails it leaves an
+INVALID index behind: drop it and rerun the upgrade.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+# (index name, table, columns). chat_messages.conversation_id and
+# chat_conversations.user_id are covered by the leading column of their composite index.
+INDEXES = [
+    ("ix_roadmaps_user_id", "roadmaps", ["user_id"]),
+    ("ix_roadmap_days_roadmap_id", "roadmap_days", ["roadmap_id"]),
+    ("ix_roadmap_tasks_roadmap_day_id", "roadmap_tasks", ["roadmap_day_id"]),
+    ("ix_tickets_roadmap_id", "tickets", ["roadmap_id"]),
+    ("ix_accommodations_roadmap_id", "accommodations", ["roadmap_id"]),
+    ("ix_places_roadmap_id", "places", ["roadmap_id"]),
+    ("ix_food_places_roadmap_id", "food_places", ["roadmap_id"]),
+    ("ix_user_preferences_user_id", "user_preferences", ["user_id"]),
+    ("ix_chat_messages_conversation_id_timestamp", "chat_messages", ["conversation_id", "timestamp"]),
+    ("ix_chat_conversations_user_id_last_updated_id", "chat_conversations", ["user_id", "last_updated", "id"]),
+]
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
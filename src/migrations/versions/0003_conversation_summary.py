@@ -0,0 +1,23 @@
+"""Rolling summary columns on chat_conversations
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("chat_conversations", sa.Column("summary", sa.Text(), nullable=True))
+    op.add_column("chat_conversations", sa.Column("summarized_until_id", sa.Integer(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("chat_conversations", "summarized_until_id")
+    op.drop_column("chat_conversations", "summary")
@@ -0,0 +1,41 @@
+"""tickets.flight_number and unique natural keys for saved tool results
+
+Duplicates saved before this revision are removed (the oldest row is kept) so the
+unique indexes can be built. The indexes are built concurrently, as in 0002.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+# (index name, table, natural key columns)
+NATURAL_KEYS = [
+    ("uq_tickets_roadmap_id_flight_number_departure", "tickets", ["roadmap_id", "flight_number", "departure"]),
+    ("uq_accommodations_roadmap_id_name_check_in_check_out", "accommodations", ["roadmap_id", "name", "check_in", "check_out"]),
+    ("uq_places_roadmap_id_name_location", "places", ["roadmap_id", "name", "location"]),
+]
+
+
+def upgrade():
+    op.add_column("tickets", sa.Column("flight_number", sa.String(), nullable=True))
+    # tickets.flight_number is new and NULL everywhere, and NULLs never conflict
+    for _, table, columns in NATURAL_KEYS[1:]:
+        same_key = " AND ".join(f'newer."{c}" = older."{c}"' for c in columns)
+        op.execute(f"DELETE FROM {table} newer USING {table} older WHERE newer.id > older.id AND {same_key}")
+    with op.get_context().autocommit_block():
+        for name, table, columns in NATURAL_KEYS:
+            op.create_index(name, table, columns, unique=True, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(NATURAL_KEYS):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+    op.drop_column("tickets", "flight_number")
@@ -0,0 +1,64 @@
+"""NULLS NOT DISTINCT natural keys for saved tool results
+
+The 0004 indexes let rows with a NULL key column (a place without a location, a ticket
+without a departure time) be inserted again on every search. They are rebuilt as NULLS
+NOT DISTINCT (PostgreSQL 15+). The ticket key also gains from/to: unnumbered flights are
+now stored with a NULL flight_number instead of 'Unknown', and the route keeps different
+unnumbered flights apart.
+
+Duplicates under the new keys are removed first (the oldest row is kept). Each index is
+built concurrently next to the old one and then takes its name, so ON CONFLICT always
+has a matching index during the migration.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+# (table, 0004 index, 0004 columns, new index, new columns)
+NATURAL_KEYS = [
+    (
+        "tickets",
+        "uq_tickets_roadmap_id_flight_number_departure", ["roadmap_id", "flight_number", "departure"],
+        "uq_tickets_roadmap_id_flight_number_from_to_departure", ["roadmap_id", "flight_number", "from", "to", "departure"],
+    ),
+    (
+        "accommodations",
+        "uq_accommodations_roadmap_id_name_check_in_check_out", ["roadmap_id", "name", "check_in", "check_out"],
+        "uq_accommodations_roadmap_id_name_check_in_check_out", ["roadmap_id", "name", "check_in", "check_out"],
+    ),
+    (
+        "places",
+        "uq_places_roadmap_id_name_location", ["roadmap_id", "name", "location"],
+        "uq_places_roadmap_id_name_location", ["roadmap_id", "name", "location"],
+    ),
+]
+
+
+def _swap_index(table, old, new, columns, **kw):
+    """Builds `new` under a temporary name, drops `old` and renames the new index."""
+    op.create_index(f"{new}_tmp", table, columns, unique=True, postgresql_concurrently=True, if_not_exists=True, **kw)
+    op.drop_index(old, table_name=table, postgresql_concurrently=True, if_exists=True)
+    op.execute(f"ALTER INDEX {new}_tmp RENAME TO {new}")
+
+
+def upgrade():
+    op.execute("UPDATE tickets SET flight_number = NULL WHERE flight_number IN ('', 'Unknown')")
+    for table, _, _, _, columns in NATURAL_KEYS:
+        same_key = " AND ".join(f'newer."{c}" IS NOT DISTINCT FROM older."{c}"' for c in columns)
+        op.execute(f"DELETE FROM {table} newer USING {table} older WHERE newer.id > older.id AND {same_key}")
+    with op.get_context().autocommit_block():
+        for table, old, _, new, columns in NATURAL_KEYS:
+            _swap_index(table, old, new, columns, postgresql_nulls_not_distinct=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for table, old, columns, new, _ in reversed(NATURAL_KEYS):
+            _swap_index(table, new, old, columns)
@@ -0,0 +1,71 @@
+import os
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+import codec
+from config import binary_redis_client
+
+# One sorted set per user, scored by creation time. Each write trims the inbox to the
+# newest NOTIFICATION_INBOX_SIZE entries younger than NOTIFICATION_MAX_AGE seconds, so
+# reads cost O(log n + page) and memory per user is bounded. Members are codec-encoded.
+NOTIFICATION_INBOX_SIZE = int(os.getenv("NOTIFICATION_INBOX_SIZE", "200"))
+NOTIFICATION_MAX_AGE = int(os.getenv("NOTIFICATION_MAX_AGE", str(7 * 86400)))
+
+
+def _inbox_key(user_id) -> str:
+    return f"notifications:{user_id}"
+
+
+def _read_at_key(user_id) -> str:
+    # Score up to which the user has read; everything newer counts as unread
+    return f"notifications:{user_id}:read_at"
+
+
+def push_notification(user_id, message: str) -> Dict:
+    now = time.time()
+    notification = {"id": uuid.uuid4().hex, "message": message, "created_at": now}
+    key = _inbox_key(user_id)
+    with binary_redis_client.pipeline() as pipe:
+        pipe.zadd(key, {codec.dumps(notification): now})
+        pipe.zremrangebyscore(key, "-inf", now - NOTIFICATION_MAX_AGE)
+        pipe.zremrangebyrank(key, 0, -NOTIFICATION_INBOX_SIZE - 1)
+        pipe.expire(key, NOTIFICATION_MAX_AGE)
+        pipe.expire(_read_at_key(user_id), NOTIFICATION_MAX_AGE)
+        pipe.execute()
+    return notification
+
+
+def get_notifications(user_id, limit: int = 20, before: Optional[float] = None) -> Tuple[List[Dict], Optional[float], int]:
+    """
+    Newest first: up to `limit` notifications created before `before` (a created_at
+    timestamp, exclusive). Returns (notifications, next `before` or None, unread count).
+    """
+    key = _inbox_key(user_id)
+    oldest = time.time() - NOTIFICATION_MAX_AGE
+    with binary_redis_client.pipeline(transaction=False) as pipe:
+        pipe.zrevrangebyscore(key, f"({before}" if before is not None else "+inf", f"({oldest}", start=0, num=limit + 1)
+        pipe.get(_read_at_key(user_id))
+        page, read_at = pipe.execute()
+    notifications = [codec.loads(member) for member in page[:limit]]
+    next_before = notifications[-1]["created_at"] if len(page) > limit else None
+    return notifications, next_before, _count_unread(key, read_at, oldest)
+
+
+def _count_unread(key: str, read_at: Optional[bytes], oldest: float) -> int:
+    return binary_redis_client.zcount(key, f"({max(float(read_at or 0), oldest)}", "+inf")
+
+
+def get_unread_count(user_id) -> int:
+    return _count_unread(_inbox_key(user_id), binary_redis_client.get(_read_at_key(user_id)), time.time() - NOTIFICATION_MAX_AGE)
+
+
+def mark_read(user_id, up_to: Optional[float] = None) -> int:
+    """Marks notifications created up to `up_to` (default: now) as read; returns the unread count left."""
+    up_to = up_to if up_to is not None else time.time()
+    read_at_key = _read_at_key(user_id)
+    # Never move the marker backwards
+    current = binary_redis_client.get(read_at_key)
+    if current is None or float(current) < up_to:
+        binary_redis_client.set(read_at_key, up_to, ex=NOTIFICATION_MAX_AGE)
+    return get_unread_count(user_id)
@@ -0,0 +1,105 @@
+import logging
+import os
+from typing import Dict, Optional
+
+import redis
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+import codec
+from config import binary_redis_client, async_binary_redis_client
+from schemas.models import RoadmapInDB, RoadmapDayInDB, RoadmapSnapshot
+
+logger = logging.getLogger(__name__)
+
+# The serialized roadmap graph is cached per roadmap. Writers to its child tables call
+# invalidate_roadmap(), which deletes the entry and bumps a version counter so a snapshot
+# built from rows read before the write is not stored afterwards.
+ROADMAP_CACHE_TTL = int(os.getenv("ROADMAP_CACHE_TTL", "3600"))
+
+CACHE_PREFIX = "roadmap_snapshot"
+
+# One SELECT for the roadmap plus one per collection, however large the trip is
+_GRAPH_OPTIONS = (
+    selectinload(RoadmapInDB.days).selectinload(RoadmapDayInDB.tasks),
+    selectinload(RoadmapInDB.tickets),
+    selectinload(RoadmapInDB.accommodations),
+    selectinload(RoadmapInDB.places),
+    selectinload(RoadmapInDB.food_places),
+)
+
+
+def _key(roadmap_id: int) -> str:
+    return f"{CACHE_PREFIX}:{roadmap_id}"
+
+
+def _version_key(roadmap_id: int) -> str:
+    return f"{CACHE_PREFIX}:{roadmap_id}:version"
+
+
+def _snapshot(roadmap: RoadmapInDB) -> Dict:
+    data = RoadmapSnapshot.model_validate(roadmap).model_dump(mode="json", by_alias=True)
+    # Relationship collections have no defined order; keep the snapshot stable
+    data["days"].sort(key=lambda d: (d["day_index"] is None, d["day_index"] or 0, d["id"]))
+    for day in data["days"]:
+        day["tasks"].sort(key=lambda t: (t["start_time"] is None, t["start_time"] or "", t["id"]))
+    for collection in ("tickets", "accommodations", "places", "food_places"):
+        data[collection].sort(key=lambda row: row["id"])
+    return data
+
+
+async def _read(roadmap_id: int):
+    """Returns (version, snapshot); snapshot is None on a miss, version feeds _store()."""
+    try:
+        async with async_binary_redis_client.pipeline(transaction=False) as pipe:
+            pipe.get(_key(roadmap_id))
+            pipe.get(_version_key(roadmap_id))
+            raw, version = await pipe.execute()
+    except redis.RedisError as e:
+        logger.warning(f"Roadmap cache unavailable: {e}")
+        return None, None
+    return version, codec.loads(raw) if raw else None
+
+
+async def _store(roadmap_id: int, version: Optional[bytes], data: Dict):
+    try:
+        async with async_binary_redis_client.pipeline() as pipe:
+            await pipe.watch(_version_key(roadmap_id))
+            if await pipe.get(_version_key(roadmap_id)) != version:
+                return
+            pipe.multi()
+            pipe.setex(_key(roadmap_id), ROADMAP_CACHE_TTL, codec.dumps(data))
+            await pipe.execute()
+    except redis.RedisError:
+        # Includes WatchError: the roadmap changed meanwhile, the next read rebuilds it.
+        pass
+
+
+async def aget_roadmap_snapshot(db: AsyncSession, roadmap_id: int) -> Optional[Dict]:
+    """The roadmap with its days, tasks, tickets, accommodations, places and food places
+    as RoadmapSnapshot JSON, or None if there is no such roadmap."""
+    version, data = await _read(roadmap_id)
+    if data is not None:
+        return data
+    roadmap = (await db.execute(
+        select(RoadmapInDB).where(RoadmapInDB.id == roadmap_id).options(*_GRAPH_OPTIONS)
+    )).scalars().first()
+    if roadmap is None:
+        return None
+    data = _snapshot(roadmap)
+    await _store(roadmap_id, version, data)
+    return data
+
+
+def invalidate_roadmap(roadmap_id: int):
+    """Must be called after committing a change to a roadmap or any of its child rows.
+    Synchronous: the writers are sync code running in worker threads."""
+    try:
+        with binary_redis_client.pipeline() as pipe:
+            pipe.incr(_version_key(roadmap_id))
+            pipe.expire(_version_key(roadmap_id), ROADMAP_CACHE_TTL)
+            pipe.delete(_key(roadmap_id))
+            pipe.execute()
+    except redis.RedisError as e:
+        logger.warning(f"Could not invalidate cached roadmap {roadmap_id}: {e}")
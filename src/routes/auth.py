@@ -1,8 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from auth_utils import hash_password, verify_password, create_access_token, verify_access_token
-from config import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from auth_utils import hash_password_async, verify_password_async, create_access_token, verify_access_token
+from config import get_db, get_async_db
+from auth_cache import aget_user_by_email, invalidate_user, clear_user_cache
 from schemas.models import UserInDB, Token
 from datetime import timedelta
 import traceback
@@ -29,10 +32,10 @@ class CreateUser(BaseModel):
     type: str = "user"
 
 @router.post("/login", response_model=Token)
-def login(user: UserLogin, db: Session = Depends(get_db)):
+async def login(user: UserLogin, db: AsyncSession = Depends(get_async_db)):
     try:
         logger.info(f"Attempting login for email: {user.email}")
-        db_user = db.query(UserInDB).filter(UserInDB.email == user.email).first()
+        db_user = (await db.execute(select(UserInDB).where(UserInDB.email == user.email))).scalars().first()
         if not db_user:
             logger.warning(f"User not found: {user.email}")
             raise HTTPException(status_code=400, detail="Invalid credentials")
@@ -40,7 +43,7 @@ def login(user: UserLogin, db: Session = Depends(get_db)):
         logger.info(f"Found user: {db_user.email}")
         logger.info("Attempting to verify password")
         
-        if not verify_password(user.password, db_user.hashed_password):
+        if not await verify_password_async(user.password, db_user.hashed_password):
             logger.warning(f"Password verification failed for user: {user.email}")
             raise HTTPException(status_code=400, detail="Invalid credentials")
         
@@ -59,14 +62,15 @@ def login(user: UserLogin, db: Session = Depends(get_db)):
     
 
 @router.post("/register", response_model=Token)
-def register(user: CreateUser, db: Session = Depends(get_db)):
-    if db.query(UserInDB).filter(UserInDB.email == user.email).first():
+async def register(user: CreateUser, db: AsyncSession = Depends(get_async_db)):
+    if (await db.execute(select(UserInDB).where(UserInDB.email == user.email))).scalars().first():
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    hashed_password = hash_password(user.password)
+    hashed_password = await hash_password_async(user.password)
     new_user = UserInDB(email=user.email, hashed_password=hashed_password, name=user.name, type=user.type)
     db.add(new_user)
-    db.commit()
+    await db.commit()
+    invalidate_user(new_user.email)
 
     access_token = create_access_token(
         data={"sub": new_user.email, "type": new_user.type},
@@ -79,18 +83,21 @@ def delete_all_users(db: Session = Depends(get_db)):
     try:
         db.query(UserInDB).delete()
         db.commit()  
+        clear_user_cache()
         return {"message": "All users deleted successfully."}
     except Exception as e:
         db.rollback() 
         raise HTTPException(status_code=500, detail=str(e))
     
-@router.get("/users/me")
-def get_me(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> UserInDB:
     payload = verify_access_token(token)
-    if payload is None:
+    if payload is None or "sub" not in payload:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
-    user_email = payload.get("sub")
-    user = db.query(UserInDB).filter(UserInDB.email == user_email).first()
+    user = await aget_user_by_email(db, payload["sub"])
     if user is None:
         raise HTTPException(status_code=404, detail="User not found")
-    return user
\ No newline at end of file
+    return user
+
+@router.get("/users/me")
+def get_me(user: UserInDB = Depends(get_current_user)):
+    return {"id": user.id, "email": user.email, "name": user.name, "type": user.type, "created_at": user.created_at}
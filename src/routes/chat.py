@@ -1,15 +1,24 @@
 from fastapi import APIRouter, HTTPException, Header, Depends, status, Query
-from fastapi.security import OAuth2PasswordBearer
-from typing import Optional, List
+from typing import Optional, List, Tuple, Union
 from ai.agent import AIAgent, ChatRequest, ChatResponse, Message
 from ai.conversation import ConversationManager
+from ai.summarizer import compact_history, needs_summary
+from celery_tasks import summarize_conversation
 import uuid
-from auth_utils import verify_access_token
-from sqlalchemy.orm import Session
-from config import get_db
-from schemas.models import UserInDB, RoadmapInDB, ChatConversation, ChatConversationSchema, ChatMessageSchema
-from tools.toolbelt import TravelToolBelt
+from routes.auth import get_current_user
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import get_async_db, SessionLocal, AsyncSessionLocal
+from schemas.models import UserInDB, RoadmapInDB, ChatConversation, ChatConversationSchema, ChatConversationPage, ChatMessageSchema
 from pydantic import BaseModel
+from sse_starlette.sse import EventSourceResponse
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Messages fetched per turn before compaction (see ai/summarizer.py)
+CONTEXT_MAX_MESSAGES = 10
 
 class UserChatRequest(BaseModel):
     messages: List[Message]
@@ -17,75 +26,119 @@ class UserChatRequest(BaseModel):
 class ChatApiResponse(BaseModel):
     response: str
     conversation_id: str
-    tool_output: Optional[List[dict]]
+    tool_output: Optional[Union[List[dict], str]]
 
 router = APIRouter()
 agent = AIAgent()
 conversation_manager = ConversationManager()
 
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
-
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    payload = verify_access_token(token)
-    if payload is None or "sub" not in payload:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired token")
+async def _prepare_turn(db: AsyncSession, user: UserInDB, request: UserChatRequest, conversation_id: Optional[str]) -> Tuple[str, ChatRequest]:
+    """Stores the incoming messages and builds the agent request for this turn."""
+    if not conversation_id:
+        # aadd_messages creates the conversation and associates it with the user
+        conversation_id = str(uuid.uuid4())
     
-    user_email = payload["sub"]
-    user = db.query(UserInDB).filter(UserInDB.email == user_email).first()
-    if user is None:
-        raise HTTPException(status_code=404, detail="User not found")
-    return user
+    # Add the turn's messages to conversation history in one transaction
+    conversation = await conversation_manager.aadd_messages(db, user, conversation_id, [(m.role, m.content) for m in request.messages])
+    
+    # Messages already folded into the summary are left out; the summary stands in for them
+    context_messages = await conversation_manager.aget_context(db, user, conversation_id, CONTEXT_MAX_MESSAGES, after_id=conversation.summarized_until_id)
+    if needs_summary(context_messages, CONTEXT_MAX_MESSAGES):
+        try:
+            summarize_conversation.apply_async((str(conversation.id),), retry=False)
+        except Exception as e:
+            logger.warning(f"Could not schedule summary of conversation {conversation.id}: {e}")
+    
+    # Find or create a roadmap for the user
+    roadmap = (await db.execute(select(RoadmapInDB).where(RoadmapInDB.user_id == user.id))).scalars().first()
+    if not roadmap:
+        roadmap = RoadmapInDB(user_id=user.id, title=f"Trip for {user.name}", destination="")
+        db.add(roadmap)
+        await db.commit()
+
+    # Prepare request for the agent; the summary stands in for older turns, so only the
+    # newest messages are sent verbatim
+    return conversation_id, ChatRequest(messages=compact_history(context_messages), roadmap_id=roadmap.id, summary=conversation.summary)
 
 @router.post("/", response_model=ChatApiResponse)
 async def chat(
     request: UserChatRequest,
     conversation_id: Optional[str] = Query(None),
     user: UserInDB = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
-        if not conversation_id:
-            conversation_id = str(uuid.uuid4())
-            # Create a new conversation in the DB and associate it with the user
-            conversation_manager.create_conversation(db, user, conversation_id)
+        conversation_id, agent_request = await _prepare_turn(db, user, request, conversation_id)
         
-        # Add user message to conversation history
-        for message in request.messages:
-            conversation_manager.add_message(db, user, conversation_id, message.role, message.content)
-        
-        context_messages = conversation_manager.get_context(db, user, conversation_id)
-        
-        # Find or create a roadmap for the user
-        roadmap = db.query(RoadmapInDB).filter(RoadmapInDB.user_id == user.id).first()
-        if not roadmap:
-            roadmap = RoadmapInDB(user_id=user.id, title=f"Trip for {user.name}", destination="")
-            db.add(roadmap)
-            db.commit()
-            db.refresh(roadmap)
-
-        # Prepare request for the agent, now including roadmap_id
-        agent_request = ChatRequest(messages=context_messages, roadmap_id=roadmap.id)
-        
-        # Initialize the toolbelt with the db session and roadmap_id
-        toolbelt = TravelToolBelt(db=db, roadmap_id=roadmap.id)
-        
-        # Get response from the agent
-        agent_response = await agent.chat(agent_request, db)
+        # Get response from the agent; each tool call opens its own sync session
+        agent_response = await agent.chat(agent_request, SessionLocal)
         
         # Add assistant's response to conversation history
-        conversation_manager.add_message(db, user, conversation_id, "assistant", agent_response.response)
+        await conversation_manager.aadd_messages(db, user, conversation_id, [("assistant", agent_response.response)])
         
         return ChatApiResponse(response=agent_response.response, conversation_id=conversation_id, tool_output=agent_response.tool_output)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/conversations", response_model=List[ChatConversationSchema])
-async def get_user_conversations(user: UserInDB = Depends(get_current_user), db: Session = Depends(get_db)):
-    return conversation_manager.get_user_conversations(db, user)
+@router.post("/stream")
+async def chat_stream(
+    request: UserChatRequest,
+    conversation_id: Optional[str] = Query(None),
+    user: UserInDB = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Same as POST /chat/ but answers with server-sent events: `conversation` first, then
+    `token`, `tool_start` and `tool_end` as the agent runs, and a final `done` event whose
+    data is a ChatApiResponse. Failures after the stream started arrive as an `error` event.
+    """
+    try:
+        conversation_id, agent_request = await _prepare_turn(db, user, request, conversation_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    async def events():
+        yield {"event": "conversation", "data": json.dumps({"conversation_id": conversation_id})}
+        try:
+            async for event, data in agent.stream(agent_request, SessionLocal):
+                if event == "done":
+                    async with AsyncSessionLocal() as stream_db:
+                        await conversation_manager.aadd_messages(stream_db, user, conversation_id, [("assistant", data.response)])
+                    data = ChatApiResponse(response=data.response, conversation_id=conversation_id, tool_output=data.tool_output).model_dump()
+                yield {"event": event, "data": json.dumps(data, default=str)}
+        except Exception as e:
+            yield {"event": "error", "data": json.dumps({"detail": str(e)})}
+
+    return EventSourceResponse(events())
+
+@router.get("/conversations", response_model=ChatConversationPage)
+async def get_user_conversations(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    messages: int = Query(0, ge=0, le=50, description="Latest messages to include per conversation; 0 returns summary rows"),
+    user: UserInDB = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Conversations by most recent activity; pass next_cursor back as cursor for the next page."""
+    try:
+        conversations, page_messages, next_cursor = await conversation_manager.aget_conversation_page(db, user, limit, cursor, messages)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    items = [
+        ChatConversationSchema(
+            id=c.id,
+            user_id=c.user_id,
+            created_at=c.created_at,
+            last_updated=c.last_updated,
+            messages=[ChatMessageSchema.model_validate(m) for m in page_messages[c.id]],
+        )
+        for c in conversations
+    ]
+    return ChatConversationPage(items=items, next_cursor=next_cursor)
 
 @router.get("/conversation/{conversation_id}", response_model=ChatConversationSchema)
-async def get_conversation(conversation_id: str, user: UserInDB = Depends(get_current_user), db: Session = Depends(get_db)):
-    conversation = conversation_manager.get_conversation(db, user, conversation_id)
+async def get_conversation(conversation_id: str, user: UserInDB = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    conversation = await conversation_manager.aget_conversation(db, user, conversation_id, with_messages=True)
     if not conversation:
         raise HTTPException(status_code=404, detail="Conversation not found")
-    return conversation 
\ No newline at end of file
+    return conversation
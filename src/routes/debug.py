@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends
+from config import engine, async_engine
+from db_pool import pool_status, DB_POOL_SIZE, DB_MAX_OVERFLOW
+from tools.flight_cache import get_cache_stats as get_flight_cache_stats
+from auth_cache import get_cache_stats as get_user_cache_stats
+from ai.llm_cache import response_cache
+from routes.auth import get_current_user
+
+# Only mounted when DEBUG_ROUTES is set (app.py), and only for signed-in users
+router = APIRouter(dependencies=[Depends(get_current_user)])
+
+@router.get("/pool")
+def get_pool_status():
+    """Connection pool gauges and counters of this worker process, for pool sizing."""
+    return {
+        "sync": pool_status(engine),
+        "async": pool_status(async_engine),
+        "max_connections_per_worker": 2 * (DB_POOL_SIZE + DB_MAX_OVERFLOW),
+    }
+
+@router.get("/caches")
+def get_cache_status():
+    return {
+        "flight_search": get_flight_cache_stats(),
+        "users": get_user_cache_stats(),
+        "llm_responses": response_cache.get_stats(),
+    }
@@ -0,0 +1,38 @@
+from fastapi import APIRouter, Depends, Query
+from pydantic import BaseModel
+from typing import List, Optional
+from routes.auth import get_current_user
+from schemas.models import UserInDB
+from notifications import get_notifications, get_unread_count, mark_read
+
+router = APIRouter()
+
+class NotificationSchema(BaseModel):
+    id: str
+    message: str
+    created_at: float
+
+class NotificationPage(BaseModel):
+    items: List[NotificationSchema]
+    next_before: Optional[float] = None
+    unread: int
+
+class MarkReadRequest(BaseModel):
+    up_to: Optional[float] = None  # created_at of the newest notification seen; default now
+
+@router.get("/", response_model=NotificationPage)
+def list_notifications(
+    limit: int = Query(20, ge=1, le=100),
+    before: Optional[float] = Query(None, description="next_before of the previous page"),
+    user: UserInDB = Depends(get_current_user)
+):
+    items, next_before, unread = get_notifications(user.id, limit, before)
+    return NotificationPage(items=items, next_before=next_before, unread=unread)
+
+@router.get("/unread-count")
+def unread_count(user: UserInDB = Depends(get_current_user)):
+    return {"unread": get_unread_count(user.id)}
+
+@router.post("/read")
+def read_notifications(request: MarkReadRequest, user: UserInDB = Depends(get_current_user)):
+    return {"unread": mark_read(user.id, request.up_to)}
@@ -1,25 +1,21 @@
-from fastapi import APIRouter
-from pydantic import BaseModel
-import os
-from pydantic_ai import Agent
-from pydantic_ai.models.groq import GroqModel
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import get_async_db
+from roadmap_snapshot import aget_roadmap_snapshot
+from routes.auth import get_current_user
+from schemas.models import UserInDB, RoadmapSnapshot
 
 router = APIRouter()
 
-# Pydantic models for request/response
-class ChatRequest(BaseModel):
-    message: str
-
-class ChatResponse(BaseModel):
-    response: str
-
-# Set up the Groq agent
-model = GroqModel("llama-3-70b-8192")
-agent = Agent(model)
-
-@router.post("/chat", response_model=ChatResponse)
-async def chat_endpoint(request: ChatRequest):
-    result = await agent.run(request.message)
-    # result is a RunResult, get the text from the last message
-    text = result.text if hasattr(result, "text") else str(result)
-    return ChatResponse(response=text)
+@router.get("/{roadmap_id}", response_model=RoadmapSnapshot)
+async def get_roadmap(roadmap_id: int, user: UserInDB = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    """
+    The whole trip: days with their tasks, tickets, accommodations, places and food places.
+    Served from the cached snapshot (roadmap_snapshot.py) when possible.
+    """
+    snapshot = await aget_roadmap_snapshot(db, roadmap_id)
+    if snapshot is None or snapshot["user_id"] != user.id:
+        raise HTTPException(status_code=404, detail="Roadmap not found")
+    # Already RoadmapSnapshot JSON; returning a response skips validating it again
+    return ORJSONResponse(snapshot)
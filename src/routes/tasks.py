@@ -1,11 +1,38 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends, Query
 from pydantic import BaseModel
-from celery_tasks import add_numbers, long_running_task, process_data, send_notification
+from celery import chord, states
+from celery_tasks import (
+    add_numbers, long_running_task, process_data, send_notification,
+    search_tickets, search_hotels, search_activities, collect_search_results,
+)
 from celery_app import celery_app
-from typing import Any
+from config import get_async_db
+from routes.auth import get_current_user
+from schemas.models import UserInDB, RoadmapInDB
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sse_starlette.sse import EventSourceResponse
+from pydantic import Field
+from typing import Any, Dict, List, Optional
+import asyncio
+import json
+import os
+import redis.asyncio
 
 router = APIRouter()
 
+# Batch and stream lookups are bounded so one request cannot pin a huge key list
+MAX_TASK_IDS = 500
+# SUCCESS, FAILURE and REVOKED; a RETRY is still running
+FINISHED_STATUSES = states.READY_STATES
+# /tasks/stream ends after this many seconds without a status change. Celery reports an
+# unknown or expired task id as PENDING forever, so a stream must not wait on it for good.
+TASK_STREAM_IDLE_TIMEOUT = float(os.getenv("TASK_STREAM_IDLE_TIMEOUT", "300"))
+
+# asyncio client for the Celery result backend: batch reads and pub/sub must not block
+# the event loop (celery_app.backend.client is synchronous)
+_backend_client = redis.asyncio.from_url(celery_app.conf.result_backend)
+
 class TaskResponse(BaseModel):
     task_id: str
     status: str
@@ -18,6 +45,24 @@ class NotificationRequest(BaseModel):
     user_id: str
     message: str
 
+class RoadmapSearchRequest(BaseModel):
+    roadmap_id: int
+    start_date: str
+    end_date: str
+    # Tickets are searched when both IATA codes are given
+    departure_id: Optional[str] = None
+    destination_id: Optional[str] = None
+    # Hotels and activities are searched when a destination is given
+    destination: Optional[str] = None
+    preference: str = "comfortable"
+    interests: List[str] = []
+
+class RoadmapSearchResponse(TaskResponse):
+    searches: Dict[str, str]
+
+class TaskStatusBatchRequest(BaseModel):
+    task_ids: List[str] = Field(..., min_length=1, max_length=MAX_TASK_IDS)
+
 @router.post("/add", response_model=TaskResponse)
 async def add_task(x: int, y: int):
     """Trigger an add numbers task."""
@@ -58,41 +103,168 @@ async def send_notification_task(request: NotificationRequest):
         message=f"Notification task started for user {request.user_id}"
     )
 
+@router.post("/roadmap-search", response_model=RoadmapSearchResponse)
+async def start_roadmap_search(
+    request: RoadmapSearchRequest,
+    user: UserInDB = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Runs the ticket, hotel and activity searches for a roadmap in parallel on workers.
+    task_id resolves to {search: result} once all of them finished; `searches` holds the
+    id of each search, whose PROGRESS can be followed on /tasks/status/{task_id}.
+    """
+    roadmap = (await db.execute(
+        select(RoadmapInDB.id).where(RoadmapInDB.id == request.roadmap_id, RoadmapInDB.user_id == user.id)
+    )).first()
+    if not roadmap:
+        raise HTTPException(status_code=404, detail="Roadmap not found")
+
+    signatures = {}
+    if request.departure_id and request.destination_id:
+        signatures["tickets"] = search_tickets.s(request.roadmap_id, request.departure_id, request.destination_id, request.start_date, request.end_date)
+    if request.destination:
+        signatures["hotels"] = search_hotels.s(request.roadmap_id, request.destination, request.start_date, request.end_date, request.preference)
+        if request.interests:
+            signatures["activities"] = search_activities.s(request.roadmap_id, request.destination, request.interests)
+    if not signatures:
+        raise HTTPException(status_code=400, detail="Nothing to search: give departure_id and destination_id, or destination")
+
+    names = list(signatures)
+    result = chord(list(signatures.values()))(collect_search_results.s(names))
+    return RoadmapSearchResponse(
+        task_id=result.id,
+        status="PENDING",
+        message=f"Started {', '.join(names)} search for roadmap {request.roadmap_id}",
+        searches={name: child.id for name, child in zip(names, result.parent.results)},
+    )
+
+def _status_payload(task_id: str, meta: dict) -> dict:
+    """Response for one task, from its result backend meta (status, result)."""
+    state = meta["status"]
+    if state == "PENDING":
+        return {
+            "task_id": task_id,
+            "status": "PENDING",
+            "message": "Task is waiting to be processed"
+        }
+    elif state == "STARTED":
+        return {
+            "task_id": task_id,
+            "status": "STARTED",
+            "message": "Task has been picked up by a worker"
+        }
+    elif state == "PROGRESS":
+        return {
+            "task_id": task_id,
+            "status": "PROGRESS",
+            "message": "Task is being processed",
+            "progress": meta["result"]
+        }
+    elif state == "SUCCESS":
+        return {
+            "task_id": task_id,
+            "status": "SUCCESS",
+            "message": "Task completed successfully",
+            "result": meta["result"]
+        }
+    elif state == "RETRY":
+        return {
+            "task_id": task_id,
+            "status": "RETRY",
+            "message": "Task failed and will be retried",
+            "error": str(meta["result"])
+        }
+    elif state == "REVOKED":
+        return {
+            "task_id": task_id,
+            "status": "REVOKED",
+            "message": "Task has been cancelled"
+        }
+    elif state == "FAILURE":
+        return {
+            "task_id": task_id,
+            "status": "FAILURE",
+            "message": "Task failed",
+            "error": str(meta["result"])
+        }
+    else:  # e.g. RECEIVED, or a custom state reported by a task
+        return {
+            "task_id": task_id,
+            "status": state,
+            "message": f"Task is in state {state}"
+        }
+
+def _decode_meta(raw) -> dict:
+    if not raw:
+        return {"status": "PENDING", "result": None}
+    return celery_app.backend.meta_from_decoded(celery_app.backend.decode_result(raw))
+
 @router.get("/status/{task_id}")
 async def get_task_status(task_id: str):
     """Get the status of a task."""
     try:
-        task = celery_app.AsyncResult(task_id)
-        if task.state == "PENDING":
-            return {
-                "task_id": task_id,
-                "status": "PENDING",
-                "message": "Task is waiting to be processed"
-            }
-        elif task.state == "PROGRESS":
-            return {
-                "task_id": task_id,
-                "status": "PROGRESS",
-                "message": "Task is being processed",
-                "progress": task.info
-            }
-        elif task.state == "SUCCESS":
-            return {
-                "task_id": task_id,
-                "status": "SUCCESS",
-                "message": "Task completed successfully",
-                "result": task.result
-            }
-        else:  # FAILURE
-            return {
-                "task_id": task_id,
-                "status": "FAILURE",
-                "message": "Task failed",
-                "error": str(task.info)
-            }
+        raw = await _backend_client.get(celery_app.backend.get_key_for_task(task_id))
+        return _status_payload(task_id, _decode_meta(raw))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving task status: {str(e)}")
 
+@router.post("/status/batch")
+async def get_task_statuses(request: TaskStatusBatchRequest):
+    """Statuses of many tasks, read from the result backend with a single MGET."""
+    backend = celery_app.backend
+    try:
+        raw = await _backend_client.mget([backend.get_key_for_task(task_id) for task_id in request.task_ids])
+        return {task_id: _status_payload(task_id, _decode_meta(value)) for task_id, value in zip(request.task_ids, raw)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving task status: {str(e)}")
+
+@router.get("/stream")
+async def stream_task_statuses(task_id: List[str] = Query(..., max_length=MAX_TASK_IDS)):
+    """
+    Server-sent `status` events, each carrying one task's status payload: the current status
+    of every task first, then every change as workers report it. The stream ends once all
+    tasks are finished, or with a `timeout` event listing the unfinished ids when no status
+    changed for TASK_STREAM_IDLE_TIMEOUT seconds. Pass ids as repeated query parameters:
+    ?task_id=a&task_id=b
+    """
+    backend = celery_app.backend
+    channels = {backend.get_key_for_task(t).decode(): t for t in task_id}
+
+    async def events():
+        # The Redis result backend publishes every state it stores on the task's key.
+        # Subscribing before the snapshot means no change can fall between the two.
+        pubsub = _backend_client.pubsub()
+        await pubsub.subscribe(*channels)
+        try:
+            raw = await _backend_client.mget(list(channels))
+            pending = set(task_id)
+            for tid, value in zip(channels.values(), raw):
+                payload = _status_payload(tid, _decode_meta(value))
+                if payload["status"] in FINISHED_STATUSES:
+                    pending.discard(tid)
+                yield {"event": "status", "data": json.dumps(payload, default=str)}
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + TASK_STREAM_IDLE_TIMEOUT
+            while pending:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    yield {"event": "timeout", "data": json.dumps({"pending": [t for t in task_id if t in pending]})}
+                    break
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=remaining)
+                if message is None:
+                    continue
+                deadline = loop.time() + TASK_STREAM_IDLE_TIMEOUT
+                tid = channels[message["channel"].decode()]
+                payload = _status_payload(tid, _decode_meta(message["data"]))
+                if payload["status"] in FINISHED_STATUSES:
+                    pending.discard(tid)
+                yield {"event": "status", "data": json.dumps(payload, default=str)}
+        finally:
+            await pubsub.aclose()
+
+    return EventSourceResponse(events())
+
 @router.delete("/cancel/{task_id}")
 async def cancel_task(task_id: str):
     """Cancel a running task."""
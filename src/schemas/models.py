@@ -1,10 +1,11 @@
 from sqlalchemy import (
-    Column, String, Integer, Float, DateTime, Date, Time, ForeignKey, Text, Enum, ARRAY
+    Column, String, Integer, Float, DateTime, Date, Time, ForeignKey, Text, Enum, ARRAY, Index
 )
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime, date, time
-from pydantic import BaseModel, ConfigDict
+import datetime as dt
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, List
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
@@ -29,6 +30,102 @@ class ChatConversationSchema(BaseModel):
     class Config:
         from_attributes = True
 
+class ChatConversationPage(BaseModel):
+    items: List[ChatConversationSchema]
+    next_cursor: Optional[str] = None
+
+# Roadmap snapshot (GET /roadmaps/{id}, see roadmap_snapshot.py)
+class RoadmapTaskSchema(BaseModel):
+    id: int
+    type: Optional[str] = None
+    title: Optional[str] = None
+    description: Optional[str] = None
+    start_time: Optional[time] = None
+    end_time: Optional[time] = None
+    linked_id: Optional[int] = None
+    link_type: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+class RoadmapDaySchema(BaseModel):
+    id: int
+    day_index: Optional[int] = None
+    date: Optional[dt.date] = None  # the field name shadows the type inside this class
+    summary: Optional[str] = None
+    tasks: List[RoadmapTaskSchema] = []
+
+    class Config:
+        from_attributes = True
+
+class TicketSchema(BaseModel):
+    id: int
+    type: Optional[str] = None
+    from_: Optional[str] = Field(None, serialization_alias="from")
+    to: Optional[str] = None
+    departure: Optional[datetime] = None
+    arrival: Optional[datetime] = None
+    price: Optional[int] = None
+    provider_url: Optional[str] = None
+    flight_number: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+class AccommodationSchema(BaseModel):
+    id: int
+    name: Optional[str] = None
+    check_in: Optional[datetime] = None
+    check_out: Optional[datetime] = None
+    price_total: Optional[int] = None
+    location: Optional[str] = None
+    provider_url: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+class PlaceSchema(BaseModel):
+    id: int
+    name: Optional[str] = None
+    category: Optional[str] = None
+    location: Optional[str] = None
+    duration_min: Optional[int] = None
+    rating: Optional[float] = None
+    url: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+class FoodPlaceSchema(BaseModel):
+    id: int
+    name: Optional[str] = None
+    category: Optional[str] = None
+    location: Optional[str] = None
+    avg_price: Optional[int] = None
+    rating: Optional[float] = None
+    url: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+class RoadmapSnapshot(BaseModel):
+    id: int
+    user_id: int
+    title: str
+    destination: str
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    budget_total: Optional[int] = None
+    created_at: Optional[datetime] = None
+    days: List[RoadmapDaySchema] = []
+    tickets: List[TicketSchema] = []
+    accommodations: List[AccommodationSchema] = []
+    places: List[PlaceSchema] = []
+    food_places: List[FoodPlaceSchema] = []
+
+    class Config:
+        from_attributes = True
+
 Base = declarative_base()
 
 # SQLAlchemy ORM Models
@@ -48,7 +145,7 @@ class UserInDB(Base):
 class RoadmapInDB(Base):
     __tablename__ = "roadmaps"
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
     title = Column(String, nullable=False)
     destination = Column(String, nullable=False)
     start_date = Column(Date)
@@ -67,7 +164,7 @@ class RoadmapInDB(Base):
 class RoadmapDayInDB(Base):
     __tablename__ = "roadmap_days"
     id = Column(Integer, primary_key=True, index=True)
-    roadmap_id = Column(Integer, ForeignKey("roadmaps.id"))
+    roadmap_id = Column(Integer, ForeignKey("roadmaps.id"), index=True)
     day_index = Column(Integer)
     date = Column(Date)
     summary = Column(Text)
@@ -79,7 +176,7 @@ class RoadmapDayInDB(Base):
 class RoadmapTaskInDB(Base):
     __tablename__ = "roadmap_tasks"
     id = Column(Integer, primary_key=True, index=True)
-    roadmap_day_id = Column(Integer, ForeignKey("roadmap_days.id"))
+    roadmap_day_id = Column(Integer, ForeignKey("roadmap_days.id"), index=True)
     type = Column(String)
     title = Column(String)
     description = Column(Text)
@@ -94,7 +191,7 @@ class RoadmapTaskInDB(Base):
 class Ticket(Base):
     __tablename__ = "tickets"
     id = Column(Integer, primary_key=True, index=True)
-    roadmap_id = Column(Integer, ForeignKey("roadmaps.id"))
+    roadmap_id = Column(Integer, ForeignKey("roadmaps.id"), index=True)
     type = Column(String)
     from_ = Column("from", String)
     to = Column(String)
@@ -102,14 +199,24 @@ class Ticket(Base):
     arrival = Column(DateTime)
     price = Column(Integer)
     provider_url = Column(String)
+    flight_number = Column(String)
     
     # Relationships
     roadmap = relationship("RoadmapInDB", back_populates="tickets")
 
+    # Natural key for idempotent saves (tools/persistence.py); missing values are NULL,
+    # and NULLS NOT DISTINCT makes them conflict like any other value (PostgreSQL 15+)
+    __table_args__ = (
+        Index(
+            "uq_tickets_roadmap_id_flight_number_from_to_departure", "roadmap_id", "flight_number", "from", "to", "departure",
+            unique=True, postgresql_nulls_not_distinct=True,
+        ),
+    )
+
 class AccommodationInDB(Base):
     __tablename__ = "accommodations"
     id = Column(Integer, primary_key=True, index=True)
-    roadmap_id = Column(Integer, ForeignKey("roadmaps.id"))
+    roadmap_id = Column(Integer, ForeignKey("roadmaps.id"), index=True)
     name = Column(String)
     check_in = Column(DateTime)
     check_out = Column(DateTime)
@@ -120,10 +227,14 @@ class AccommodationInDB(Base):
     # Relationships
     roadmap = relationship("RoadmapInDB", back_populates="accommodations")
 
+    __table_args__ = (
+        Index("uq_accommodations_roadmap_id_name_check_in_check_out", "roadmap_id", "name", "check_in", "check_out", unique=True, postgresql_nulls_not_distinct=True),
+    )
+
 class Place(Base):
     __tablename__ = "places"
     id = Column(Integer, primary_key=True, index=True)
-    roadmap_id = Column(Integer, ForeignKey("roadmaps.id"))
+    roadmap_id = Column(Integer, ForeignKey("roadmaps.id"), index=True)
     name = Column(String)
     category = Column(String)
     location = Column(String)
@@ -134,10 +245,14 @@ class Place(Base):
     # Relationships
     roadmap = relationship("RoadmapInDB", back_populates="places")
 
+    __table_args__ = (
+        Index("uq_places_roadmap_id_name_location", "roadmap_id", "name", "location", unique=True, postgresql_nulls_not_distinct=True),
+    )
+
 class FoodPlaceInDB(Base):
     __tablename__ = "food_places"
     id = Column(Integer, primary_key=True, index=True)
-    roadmap_id = Column(Integer, ForeignKey("roadmaps.id"))
+    roadmap_id = Column(Integer, ForeignKey("roadmaps.id"), index=True)
     name = Column(String)
     category = Column(String)
     location = Column(String)
@@ -151,7 +266,7 @@ class FoodPlaceInDB(Base):
 class UserPreference(Base):
     __tablename__ = "user_preferences"
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
     food_type = Column(ARRAY(String))
     interests = Column(ARRAY(String))
     daily_budget = Column(Integer)
@@ -171,8 +286,16 @@ class ChatConversation(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     last_updated = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Rolling summary of messages up to and including summarized_until_id (ai/summarizer.py)
+    summary = Column(Text, nullable=True)
+    summarized_until_id = Column(Integer, nullable=True)
     messages = relationship("ChatMessage", back_populates="conversation", cascade="all, delete-orphan")
 
+    # Serves the keyset-paginated conversation listing (ConversationManager.aget_conversation_page)
+    __table_args__ = (
+        Index("ix_chat_conversations_user_id_last_updated_id", "user_id", "last_updated", "id"),
+    )
+
     class Config:
         from_attributes = True
 
@@ -185,5 +308,10 @@ class ChatMessage(Base):
     timestamp = Column(DateTime, default=datetime.utcnow)
     conversation = relationship("ChatConversation", back_populates="messages")
 
+    # Serves "latest N messages of a conversation" (ConversationManager.get_context)
+    __table_args__ = (
+        Index("ix_chat_messages_conversation_id_timestamp", "conversation_id", "timestamp"),
+    )
+
     class Config:
         from_attributes = True
\ No newline at end of file
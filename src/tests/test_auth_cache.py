@@ -0,0 +1,81 @@
+import asyncio
+from datetime import datetime
+
+import fakeredis
+import pytest
+import redis
+from fakeredis import aioredis
+
+import auth_cache
+from auth_cache import aget_user_by_email, invalidate_user
+from schemas.models import UserInDB
+
+
+class FakeAsyncSession:
+    """Answers the users query from a dict and counts how often it was asked."""
+
+    def __init__(self, users):
+        self.users, self.queries = users, 0
+
+    async def execute(self, statement):
+        self.queries += 1
+        email = statement.whereclause.right.value
+        user = self.users.get(email)
+        return type("Result", (), {"scalars": lambda _: type("Scalars", (), {"first": lambda _: user})()})()
+
+
+class BrokenRedis:
+    async def get(self, *args):
+        raise redis.ConnectionError("down")
+
+    async def setex(self, *args):
+        raise redis.ConnectionError("down")
+
+
+@pytest.fixture
+def db(monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(auth_cache, "binary_redis_client", fakeredis.FakeRedis(server=server))
+    monkeypatch.setattr(auth_cache, "async_binary_redis_client", aioredis.FakeRedis(server=server))
+    monkeypatch.setattr(auth_cache, "_stats", {"local_hits": 0, "redis_hits": 0, "misses": 0})
+    auth_cache._local.clear()
+    user = UserInDB(id=1, email="a@example.com", name="A", hashed_password="hash", type="user", created_at=datetime(2025, 7, 1))
+    return FakeAsyncSession({user.email: user})
+
+
+def lookup(db, email="a@example.com"):
+    return asyncio.run(aget_user_by_email(db, email))
+
+
+def test_layers_are_filled_and_read_in_order(db):
+    user = lookup(db)
+    assert (user.id, user.email, user.type, user.created_at) == (1, "a@example.com", "user", datetime(2025, 7, 1))
+
+    lookup(db)
+    auth_cache._local.clear()
+    assert lookup(db).id == 1
+    assert db.queries == 1
+    assert {k: v for k, v in auth_cache.get_cache_stats().items() if k.endswith(("hits", "misses"))} == {
+        "local_hits": 1, "redis_hits": 1, "misses": 1,
+    }
+
+
+def test_unknown_user_is_not_cached(db):
+    assert lookup(db, "nobody@example.com") is None
+    assert lookup(db, "nobody@example.com") is None
+    assert db.queries == 2
+
+
+def test_redis_outage_falls_back_to_the_database(db, monkeypatch):
+    monkeypatch.setattr(auth_cache, "async_binary_redis_client", BrokenRedis())
+    assert lookup(db).id == 1
+    auth_cache._local.clear()
+    assert lookup(db).id == 1
+    assert db.queries == 2
+
+
+def test_invalidate_user_drops_both_layers(db):
+    lookup(db)
+    invalidate_user("a@example.com")
+    lookup(db)
+    assert db.queries == 2
@@ -0,0 +1,65 @@
+import json
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from kombu.serialization import dumps as kombu_dumps, loads as kombu_loads
+
+import codec
+from tools.flight_providers import build_stub_results
+
+PARAMS = {"departure_id": "AKX", "arrival_id": "NQZ", "outbound_date": "2025-07-01", "return_date": "2025-07-08"}
+
+
+@pytest.mark.parametrize("value", [
+    None, 0, -1.5, "", "Астана", [], {}, [1, "two", None, {"three": [3.0]}],
+    {"id": "abc", "messages": [{"role": "user", "content": "hi"}]},
+])
+def test_small_values_round_trip_uncompressed(value):
+    data = codec.dumps(value)
+    assert data[:1] == b"j"
+    assert codec.loads(data) == value
+
+
+def test_large_values_round_trip_compressed():
+    results = build_stub_results(PARAMS, num_options=40)
+    data = codec.dumps(results)
+    assert data[:1] == b"z"
+    assert len(data) < len(json.dumps(results))
+    assert codec.loads(data) == results
+
+
+def test_threshold(monkeypatch):
+    monkeypatch.setattr(codec, "CODEC_COMPRESS_THRESHOLD", 10)
+    assert codec.dumps("x" * 7)[:1] == b"j"  # 9 bytes of JSON
+    assert codec.dumps("x" * 8)[:1] == b"z"
+    assert codec.loads(codec.dumps("x" * 8)) == "x" * 8
+
+
+@pytest.mark.parametrize("value", [{"results": [1, 2]}, [], "text", 42])
+def test_legacy_json_is_accepted(value):
+    assert codec.loads(json.dumps(value)) == value
+    assert codec.loads(json.dumps(value).encode()) == value
+
+
+def test_non_json_types_are_converted():
+    moment = datetime(2025, 7, 1, 8, 30)
+    conversation_id = uuid.uuid4()
+    value = {"price": Decimal("10.50"), "tags": {"a"}, "raw": b"bytes", "at": moment, "id": conversation_id, 1: "one"}
+    assert codec.loads(codec.dumps(value)) == {
+        "price": "10.50", "tags": ["a"], "raw": "bytes", "at": moment.isoformat(), "id": str(conversation_id), "1": "one",
+    }
+
+
+def test_unsupported_type_raises():
+    with pytest.raises(TypeError):
+        codec.dumps(object())
+
+
+@pytest.mark.parametrize("value", [{"task": "search", "args": [1, "AKX"]}, build_stub_results(PARAMS)])
+def test_kombu_serializer_round_trip(value):
+    codec.register_kombu_serializer()
+    content_type, content_encoding, body = kombu_dumps(value, serializer=codec.SERIALIZER_NAME)
+    assert content_type == codec.CONTENT_TYPE
+    assert kombu_loads(body, content_type, content_encoding, accept=[codec.CONTENT_TYPE]) == value
@@ -0,0 +1,108 @@
+import asyncio
+import uuid
+
+import pytest
+from fakeredis import aioredis
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import ai.conversation as conversation_module
+from ai.conversation import CONTEXT_CACHE_SIZE, ConversationManager, _context_key
+from schemas.models import Base, ChatConversation, ChatMessage, UserInDB
+
+TABLES = [UserInDB.__table__, ChatConversation.__table__, ChatMessage.__table__]
+
+
+@pytest.fixture
+def env(monkeypatch):
+    """(run, queries, redis): run() executes a coroutine with a fresh AsyncSession."""
+    monkeypatch.setattr(conversation_module, "async_binary_redis_client", aioredis.FakeRedis())
+    engine = create_async_engine("sqlite+aiosqlite://")
+    queries = []
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda conn, cursor, statement, *args: queries.append(statement))
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    loop = asyncio.new_event_loop()
+
+    async def create_tables():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all, tables=TABLES)
+        async with sessions() as db:
+            db.add(UserInDB(id=1, email="a@example.com", name="A", hashed_password="x"))
+            await db.commit()
+
+    async def with_session(fn):
+        async with sessions() as db:
+            return await fn(db)
+
+    loop.run_until_complete(create_tables())
+    yield (lambda fn: loop.run_until_complete(with_session(fn))), queries, conversation_module.async_binary_redis_client
+    loop.run_until_complete(engine.dispose())
+    loop.close()
+
+
+USER = UserInDB(id=1, email="a@example.com", name="A")
+
+
+def test_context_comes_from_the_cached_window(env):
+    run, queries, _ = env
+    manager, conversation_id = ConversationManager(), str(uuid.uuid4())
+    run(lambda db: manager.aadd_messages(db, USER, conversation_id, [("user", "hi"), ("assistant", "hello")]))
+    run(lambda db: manager.aadd_messages(db, USER, conversation_id, [("user", "to Astana")]))
+
+    queries.clear()
+    context = run(lambda db: manager.aget_context(db, USER, conversation_id, max_messages=2))
+    assert context == [{"role": "assistant", "content": "hello"}, {"role": "user", "content": "to Astana"}]
+    assert queries == []
+
+
+def test_a_miss_rebuilds_the_window_from_the_database(env):
+    run, queries, redis = env
+    manager, conversation_id = ConversationManager(), str(uuid.uuid4())
+    messages = [("user" if i % 2 == 0 else "assistant", f"message {i}") for i in range(CONTEXT_CACHE_SIZE + 5)]
+    run(lambda db: manager.aadd_messages(db, USER, conversation_id, messages))
+    key = _context_key(USER, uuid.UUID(conversation_id))
+    run(lambda db: redis.delete(key))
+
+    assert [m["content"] for m in run(lambda db: manager.aget_context(db, USER, conversation_id, max_messages=3))] == [
+        f"message {i}" for i in range(CONTEXT_CACHE_SIZE + 2, CONTEXT_CACHE_SIZE + 5)
+    ]
+    assert run(lambda db: redis.llen(key)) == CONTEXT_CACHE_SIZE
+
+    queries.clear()
+    run(lambda db: manager.aget_context(db, USER, conversation_id, max_messages=3))
+    assert queries == []
+
+
+def test_summarized_messages_are_left_out(env):
+    run, _, redis = env
+    manager, conversation_id = ConversationManager(), str(uuid.uuid4())
+    run(lambda db: manager.aadd_messages(db, USER, conversation_id, [("user", "a"), ("assistant", "b"), ("user", "c")]))
+
+    for cached in (True, False):
+        if not cached:
+            run(lambda db: redis.delete(_context_key(USER, uuid.UUID(conversation_id))))
+        context = run(lambda db: manager.aget_context(db, USER, conversation_id, max_messages=10, after_id=1))
+        assert [m["content"] for m in context] == ["b", "c"]
+
+
+def test_a_write_after_the_read_keeps_the_stale_snapshot_out(env):
+    run, _, redis = env
+    manager, conversation_id = ConversationManager(), str(uuid.uuid4())
+    run(lambda db: manager.aadd_messages(db, USER, conversation_id, [("user", "a")]))
+    key = _context_key(USER, uuid.UUID(conversation_id))
+    run(lambda db: redis.delete(key))
+
+    version, cached = run(lambda db: manager._read_cached_context(key, 10))
+    assert cached is None
+    run(lambda db: manager.aadd_messages(db, USER, conversation_id, [("assistant", "b")]))
+    run(lambda db: manager._cache_context(key, version, [b"stale"]))
+    assert run(lambda db: redis.exists(key)) == 0
+
+
+def test_other_users_conversations_are_not_readable(env):
+    run, _, _ = env
+    manager, conversation_id = ConversationManager(), str(uuid.uuid4())
+    run(lambda db: manager.aadd_messages(db, USER, conversation_id, [("user", "secret")]))
+    other = UserInDB(id=2, email="b@example.com", name="B")
+    assert run(lambda db: manager.aget_context(db, other, conversation_id)) == []
+    assert run(lambda db: manager.aget_context(db, USER, "not-a-uuid")) == []
@@ -0,0 +1,34 @@
+import base64
+import uuid
+from datetime import datetime
+
+import pytest
+
+from ai.conversation import decode_cursor, encode_cursor
+from schemas.models import ChatConversation
+
+
+def _b64(raw: str) -> str:
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def test_round_trip():
+    conversation = ChatConversation(id=uuid.uuid4(), last_updated=datetime(2025, 7, 1, 8, 30, 15, 123456))
+    assert decode_cursor(encode_cursor(conversation)) == (conversation.last_updated, conversation.id)
+
+
+@pytest.mark.parametrize("cursor", [
+    "",
+    "not base64!",
+    "курсор",
+    "YWJj=",  # bad padding
+    base64.urlsafe_b64encode(b"\xff\xfe|\x80").decode(),  # not UTF-8
+    _b64("2025-07-01T08:30:00"),  # no id
+    _b64(f"2025-07-01T08:30:00|{uuid.uuid4()}|extra"),
+    _b64(f"yesterday|{uuid.uuid4()}"),
+    _b64("2025-07-01T08:30:00|not-a-uuid"),
+    _b64(f"|{uuid.uuid4()}"),
+])
+def test_malformed_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor(cursor)
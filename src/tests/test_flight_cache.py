@@ -0,0 +1,96 @@
+import asyncio
+
+import fakeredis
+import pytest
+import redis
+from fakeredis import aioredis
+
+import codec
+import tools.flight_cache as flight_cache
+from tools.flight_cache import cached_search, make_cache_key
+
+PARAMS = {"departure_id": "akx", "arrival_id": "NQZ ", "outbound_date": "2025-07-01", "return_date": "2025-07-08", "currency": "kzt", "api_key": "secret"}
+
+
+class Search:
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(0)
+        return {"best_flights": [], "call": self.calls}
+
+
+class BrokenRedis:
+    def __getattr__(self, name):
+        async def fail(*args, **kwargs):
+            raise redis.ConnectionError("down")
+        return fail
+
+
+@pytest.fixture
+def server(monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(flight_cache, "redis_client", fakeredis.FakeRedis(server=server, decode_responses=True))
+    monkeypatch.setattr(flight_cache, "async_redis_client", aioredis.FakeRedis(server=server, decode_responses=True))
+    monkeypatch.setattr(flight_cache, "async_binary_redis_client", aioredis.FakeRedis(server=server))
+    return fakeredis.FakeRedis(server=server)
+
+
+def make_stale(server):
+    key = make_cache_key(PARAMS)
+    entry = codec.loads(server.get(key))
+    entry["fetched_at"] -= flight_cache.FLIGHT_CACHE_TTL + 1
+    server.set(key, codec.dumps(entry))
+
+
+def test_key_is_normalized_and_leaves_out_secrets():
+    assert make_cache_key(PARAMS) == "flight_search:AKX:NQZ:2025-07-01:2025-07-08:KZT"
+
+
+def test_fresh_entry_is_served_without_searching(server):
+    search = Search()
+    assert asyncio.run(cached_search(PARAMS, search))["call"] == 1
+    assert asyncio.run(cached_search(dict(PARAMS, api_key="other"), search))["call"] == 1
+    assert search.calls == 1
+    stats = flight_cache.get_cache_stats()
+    assert (stats["hits"], stats["misses"], stats["hit_ratio"]) == (1, 1, 0.5)
+
+
+def test_stale_entry_is_served_while_refreshing_in_the_background(server):
+    search = Search()
+    asyncio.run(cached_search(PARAMS, search))
+    make_stale(server)
+
+    async def stale_read():
+        results = await cached_search(PARAMS, search)
+        await asyncio.gather(*flight_cache._refresh_tasks)
+        return results
+
+    assert asyncio.run(stale_read())["call"] == 1
+    assert search.calls == 2
+    assert asyncio.run(cached_search(PARAMS, search))["call"] == 2
+    assert server.get(make_cache_key(PARAMS) + ":refreshing") is None
+
+
+def test_stale_entry_is_refreshed_first_without_background_refresh(server):
+    search = Search()
+    asyncio.run(cached_search(PARAMS, search))
+    make_stale(server)
+    assert asyncio.run(cached_search(PARAMS, search, background_refresh=False))["call"] == 2
+
+
+def test_provider_errors_are_not_cached(server):
+    async def failing():
+        return {"error": "quota exceeded"}
+
+    asyncio.run(cached_search(PARAMS, failing))
+    assert server.get(make_cache_key(PARAMS)) is None
+
+
+def test_redis_outage_searches_directly(server, monkeypatch):
+    monkeypatch.setattr(flight_cache, "async_binary_redis_client", BrokenRedis())
+    search = Search()
+    assert asyncio.run(cached_search(PARAMS, search))["call"] == 1
+    assert asyncio.run(cached_search(PARAMS, search))["call"] == 2
@@ -0,0 +1,100 @@
+import itertools
+import random
+
+import pytest
+
+from tools.flight_pairing import pair_flights, split_by_direction
+from tools.flight_providers import build_stub_results
+
+START, END = "2025-07-01", "2025-07-08"
+PARAMS = {"departure_id": "AKX", "arrival_id": "NQZ", "outbound_date": START, "return_date": END, "currency": "KZT"}
+
+
+def _price(option, missing):
+    try:
+        return int(option.get("price"))
+    except (TypeError, ValueError):
+        return missing
+
+
+def brute_force_costs(flights_list, limit):
+    """Sorted costs of the `limit` cheapest pairs, trying every outbound/return combination."""
+    outbound, returns = split_by_direction(flights_list, START, END)
+    costs = [
+        # An outbound leg without a price sorts last, a return leg without one adds nothing
+        _price(out_opt, float("inf")) + _price(ret_opt, 0)
+        for (out_opt, out_seg), (ret_opt, ret_seg) in itertools.product(outbound, returns)
+        if out_seg["arrival_airport"]["id"] == ret_seg["departure_airport"]["id"]
+    ]
+    return sorted(costs)[:limit]
+
+
+def paired_costs(flights_list, paired):
+    by_number = {option["flights"][0]["flight_number"]: option for option in flights_list}
+    costs = []
+    for pair in paired:
+        outbound, inbound = pair["segments"]
+        assert (outbound["direction"], inbound["direction"]) == ("outbound", "return")
+        assert outbound["to_airport"]["code"] == inbound["from_airport"]["code"]
+        out_opt, ret_opt = by_number[outbound["flight_number"]], by_number[inbound["flight_number"]]
+        costs.append(_price(out_opt, float("inf")) + _price(ret_opt, 0))
+    return costs
+
+
+def mixed_results(seed):
+    """Stub payload with several arrival airports and some unusable prices."""
+    rng = random.Random(seed)
+    results = build_stub_results(PARAMS, num_options=60, seed=seed)
+    for option in results["best_flights"]:
+        seg = option["flights"][0]
+        hub = rng.choice(["NQZ", "CIT", "GUW"])
+        if seg["departure_airport"]["id"] == "AKX":
+            seg["arrival_airport"]["id"] = hub
+        else:
+            seg["departure_airport"]["id"] = hub
+        option["price"] = rng.choice([option["price"]] * 6 + [None, "Unknown", str(option["price"])])
+    return results
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("limit", [1, 8, 50])
+def test_stub_results_match_brute_force(seed, limit):
+    results = build_stub_results(PARAMS, num_options=40, seed=seed)
+    flights_list = results["best_flights"]
+    paired = pair_flights(results, flights_list, START, END, limit=limit)
+    costs = paired_costs(flights_list, paired)
+    assert costs == sorted(costs)
+    assert costs == brute_force_costs(flights_list, limit)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_mixed_airports_and_prices_match_brute_force(seed):
+    results = mixed_results(seed)
+    flights_list = results["best_flights"]
+    paired = pair_flights(results, flights_list, START, END, limit=20)
+    assert paired_costs(flights_list, paired) == brute_force_costs(flights_list, 20)
+
+
+def test_pair_price_and_fields():
+    results = build_stub_results(PARAMS, num_options=4, seed=1)
+    flights_list = results["best_flights"]
+    out_opt, ret_opt = flights_list[0], flights_list[1]
+    ret_opt["price"] = None
+    out_opt["price"], flights_list[2]["price"], flights_list[3]["price"] = 100, 500, 900
+
+    best = pair_flights(results, flights_list, START, END, limit=1)[0]
+    # The return leg without a price is the cheapest one and leaves the outbound price as is
+    assert best["price"] == 100
+    assert best["currency"] == "KZT"
+    assert best["buy_url"] == out_opt["link"]
+    assert [s["flight_number"] for s in best["segments"]] == ["KC 1000", "KC 1001"]
+    assert [s["price"] for s in best["segments"]] == [100, None]
+
+
+def test_no_matching_airports_gives_no_pairs():
+    results = build_stub_results(PARAMS, num_options=10)
+    for option in results["best_flights"]:
+        seg = option["flights"][0]
+        if seg["departure_airport"]["id"] == "NQZ":
+            seg["departure_airport"]["id"] = "CIT"
+    assert pair_flights(results, results["best_flights"], START, END) == []
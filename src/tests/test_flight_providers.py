@@ -0,0 +1,50 @@
+import asyncio
+
+import httpx
+import pytest
+
+from tools.flight_providers import FlightProvider, FlightProviderError, SerpApiFlightProvider
+
+
+def search(handler):
+    provider = SerpApiFlightProvider(api_key="secret")
+
+    async def run():
+        provider._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        provider._client_loop = asyncio.get_running_loop()
+        try:
+            return await provider.search({"engine": "google_flights"})
+        finally:
+            await provider.aclose()
+
+    return asyncio.run(run())
+
+
+def test_flight_provider_is_abstract():
+    with pytest.raises(TypeError):
+        FlightProvider()
+
+
+def test_search_returns_results():
+    payload = search(lambda request: httpx.Response(200, json={"best_flights": []}))
+    assert payload == {"best_flights": []}
+
+
+def test_search_passes_serpapi_error_bodies_through():
+    payload = search(lambda request: httpx.Response(401, json={"error": "Invalid API key."}))
+    assert payload == {"error": "Invalid API key."}
+
+
+def test_search_raises_on_html_error_page():
+    with pytest.raises(FlightProviderError, match="HTTP 502 with text/html"):
+        search(lambda request: httpx.Response(502, text="<html>Bad Gateway</html>", headers={"content-type": "text/html"}))
+
+
+def test_search_raises_on_server_error_without_error_body():
+    with pytest.raises(FlightProviderError, match="HTTP 503"):
+        search(lambda request: httpx.Response(503, json={"status": "down"}))
+
+
+def test_search_raises_on_undecodable_json():
+    with pytest.raises(FlightProviderError, match="HTTP 200"):
+        search(lambda request: httpx.Response(200, text="{truncated", headers={"content-type": "application/json"}))
@@ -0,0 +1,57 @@
+import asyncio
+import itertools
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from ai.agent import AIAgent, ChatRequest, Message
+from ai.llm_cache import LLMResponseCache
+
+
+class FakeToolCallingModel(GenericFakeChatModel):
+    """Always answers with plain text; bind_tools() converts schemas like ChatGroq does."""
+
+    def bind_tools(self, tools, **kwargs):
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], **kwargs)
+
+
+def make_agent(cache):
+    replies = (AIMessage(content=f"Where would you like to go? ({i})") for i in itertools.count())
+    return AIAgent(llm=FakeToolCallingModel(messages=replies, cache=cache))
+
+
+def request(text):
+    return ChatRequest(messages=[Message(role="user", content=text)], roadmap_id=1)
+
+
+def test_repeated_chat_turns_are_served_from_the_cache():
+    cache = LLMResponseCache()
+    agent = make_agent(cache)
+
+    async def turns():
+        return [
+            await agent.chat(request("Hi, I want to plan a trip"), session_factory=None),
+            await agent.chat(request("hi,  I want to plan a TRIP"), session_factory=None),
+            await agent.chat(request("Hi, I want to plan a trip"), session_factory=None),
+        ]
+
+    first, second, third = asyncio.run(turns())
+    assert first.response == second.response == third.response == "Where would you like to go? (0)"
+    stats = cache.get_stats()
+    assert (stats["misses"], stats["hits"], stats["size"]) == (1, 2, 1)
+
+
+def test_different_input_misses():
+    cache = LLMResponseCache()
+    agent = make_agent(cache)
+
+    async def turns():
+        return [
+            await agent.chat(request("Hi, I want to plan a trip"), session_factory=None),
+            await agent.chat(request("I want to fly to Astana"), session_factory=None),
+        ]
+
+    first, second = asyncio.run(turns())
+    assert first.response != second.response
+    assert (cache.get_stats()["misses"], cache.get_stats()["hits"]) == (2, 0)
@@ -0,0 +1,95 @@
+from types import SimpleNamespace
+
+import fakeredis
+import pytest
+
+import notifications
+from notifications import get_notifications, get_unread_count, mark_read, push_notification
+
+
+class Clock:
+    def __init__(self, now: float = 1_750_000_000.0):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(notifications, "binary_redis_client", fakeredis.FakeRedis())
+    monkeypatch.setattr(notifications, "time", SimpleNamespace(time=clock.time))
+    return clock
+
+
+def push_many(clock, user_id, count):
+    pushed = []
+    for i in range(count):
+        clock.now += 1
+        pushed.append(push_notification(user_id, f"message {i}"))
+    return pushed
+
+
+def test_pages_walk_the_inbox_newest_first(clock):
+    pushed = push_many(clock, 1, 25)
+    seen, before = [], None
+    for expected_size in (10, 10, 5):
+        page, before, unread = get_notifications(1, limit=10, before=before)
+        assert len(page) == expected_size
+        assert unread == 25
+        seen.extend(page)
+    assert before is None
+    assert seen == pushed[::-1]
+
+
+def test_full_last_page_has_no_next_page(clock):
+    push_many(clock, 1, 10)
+    page, before, _ = get_notifications(1, limit=10)
+    assert len(page) == 10 and before is None
+
+    page, before, _ = get_notifications(1, limit=5)
+    assert before == page[-1]["created_at"]
+    assert len(get_notifications(1, limit=5, before=before)[0]) == 5
+
+
+def test_empty_inbox(clock):
+    assert get_notifications(1) == ([], None, 0)
+    assert get_unread_count(1) == 0
+
+
+def test_mark_read_counts_only_newer_notifications(clock):
+    pushed = push_many(clock, 1, 6)
+    assert get_unread_count(1) == 6
+    assert mark_read(1, pushed[3]["created_at"]) == 2
+    assert get_notifications(1)[2] == 2
+
+    # The marker never moves backwards
+    assert mark_read(1, pushed[0]["created_at"]) == 2
+
+    push_many(clock, 1, 1)
+    assert get_unread_count(1) == 3
+    assert mark_read(1) == 0
+
+
+def test_inbox_is_trimmed_to_the_newest_entries(clock, monkeypatch):
+    monkeypatch.setattr(notifications, "NOTIFICATION_INBOX_SIZE", 5)
+    pushed = push_many(clock, 1, 8)
+    page, before, unread = get_notifications(1, limit=20)
+    assert page == pushed[:2:-1]
+    assert (before, unread) == (None, 5)
+
+
+def test_expired_notifications_are_not_returned_or_counted(clock):
+    old = push_many(clock, 1, 3)
+    clock.now += notifications.NOTIFICATION_MAX_AGE - 2
+    assert get_unread_count(1) == 2
+    assert get_notifications(1)[0] == old[:0:-1]
+
+
+def test_users_have_separate_inboxes(clock):
+    push_many(clock, 1, 3)
+    pushed = push_many(clock, 2, 1)
+    mark_read(1)
+    assert get_notifications(2) == (pushed, None, 1)
+    assert get_unread_count(1) == 0
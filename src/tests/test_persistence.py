@@ -0,0 +1,123 @@
+import asyncio
+import re
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+import tools.persistence as persistence
+import tools.ticket_parser as ticket_parser
+from tools.flight_pairing import pair_flights
+from tools.flight_providers import build_stub_results
+from tools.persistence import save_tickets
+
+PARAMS = {"departure_id": "AKX", "arrival_id": "NQZ", "outbound_date": "2025-07-01", "return_date": "2025-07-08"}
+
+
+class FakeSession:
+    """Records the statements save_* would send to PostgreSQL."""
+
+    def __init__(self, rowcount=None, error=None):
+        self.rowcount, self.error = rowcount, error
+        self.statements, self.commits, self.rollbacks = [], 0, 0
+
+    def execute(self, statement):
+        if self.error:
+            raise self.error
+        self.statements.append(statement.compile(dialect=postgresql.dialect()))
+        return SimpleNamespace(rowcount=len(self.rows()) if self.rowcount is None else self.rowcount)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def rows(self):
+        """Rows of the last multi-row INSERT, as {column key: bound value}."""
+        rows = {}
+        for name, value in self.statements[-1].params.items():
+            column, index = re.fullmatch(r"(.+)_m(\d+)", name).groups()
+            rows.setdefault(int(index), {})[column] = value
+        return [rows[i] for i in sorted(rows)]
+
+
+@pytest.fixture
+def invalidated(monkeypatch):
+    roadmap_ids = []
+    monkeypatch.setattr(persistence, "invalidate_roadmap", roadmap_ids.append)
+    return roadmap_ids
+
+
+def flight(price, flight_number="KC 101", departure="2025-07-01 08:00"):
+    segment = {
+        "from_airport": {"name": "Almaty", "code": "ALA", "time": departure},
+        "to_airport": {"name": "Astana", "code": "NQZ", "time": "2025-07-01 10:00"},
+        "flight_number": flight_number,
+        "direction": "outbound",
+        "price": price,
+    }
+    return {"segments": [segment], "price": price, "buy_url": "https://example.com/book"}
+
+
+@pytest.mark.parametrize("price, stored", [
+    (45000, 45000), ("45000", 45000), (None, None), ("Unknown", None), ("45 000 ₸", None), ({}, None),
+])
+def test_ticket_price_is_an_int_or_null(price, stored, invalidated):
+    flights = [flight(price)]
+    if price is None:
+        del flights[0]["segments"][0]["price"]
+    db = FakeSession()
+    assert save_tickets(db, 7, flights) == 1
+    assert db.rows()[0]["price"] == stored
+    assert db.commits == 1
+    assert invalidated == [7]
+
+
+def test_missing_values_are_stored_as_null(invalidated):
+    db = FakeSession()
+    save_tickets(db, 7, [flight(100, flight_number="Unknown", departure="soon"), flight(100, flight_number="")])
+    rows = db.rows()
+    assert [row["flight_number"] for row in rows] == [None, None]
+    assert rows[0]["departure"] is None
+    assert 'ON CONFLICT (roadmap_id, flight_number, "from", "to", departure) DO NOTHING' in str(db.statements[0])
+
+
+def test_repeated_segments_are_sent_once(invalidated):
+    db = FakeSession()
+    assert save_tickets(db, 7, [flight(100), flight("Unknown"), flight(100, flight_number="KC 102")]) == 2
+    assert [(row["flight_number"], row["price"]) for row in db.rows()] == [("KC 101", 100), ("KC 102", 100)]
+
+
+def test_paired_legs_keep_their_own_price(invalidated):
+    results = build_stub_results(PARAMS, num_options=10, seed=3)
+    fares = {option["flights"][0]["flight_number"]: option["price"] for option in results["best_flights"]}
+    paired = pair_flights(results, results["best_flights"], "2025-07-01", "2025-07-08")
+    db = FakeSession()
+    # 5 outbound x 5 return legs, each leg in several of the 8 pairs
+    assert save_tickets(db, 7, paired) < 16
+    rows = db.rows()
+    assert all(row["price"] == fares[row["flight_number"]] for row in rows)
+    assert sum(row["price"] for row in rows) < sum(flight["price"] for flight in paired)
+
+
+def test_nothing_new_keeps_the_cached_roadmap(invalidated):
+    db = FakeSession(rowcount=0)
+    assert save_tickets(db, 7, [flight(100)]) == 0
+    assert invalidated == []
+    assert save_tickets(db, 7, []) == 0
+    assert len(db.statements) == 1
+
+
+def test_find_tickets_returns_flights_when_saving_fails(monkeypatch, invalidated):
+    results = build_stub_results(PARAMS, num_options=10)
+
+    async def cached_search(params, fetch, background_refresh=True):
+        return results
+
+    monkeypatch.setattr(ticket_parser, "cached_search", cached_search)
+    db = FakeSession(error=RuntimeError("connection lost"))
+    flights = asyncio.run(ticket_parser.find_tickets(db, 7, "AKX", "NQZ", "2025-07-01", "2025-07-08"))
+    assert flights == pair_flights(results, results["best_flights"], "2025-07-01", "2025-07-08")
+    assert db.rollbacks == 1
+    assert invalidated == []
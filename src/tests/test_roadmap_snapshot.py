@@ -0,0 +1,41 @@
+import asyncio
+
+import fakeredis
+import pytest
+from fakeredis import aioredis
+
+import roadmap_snapshot
+from roadmap_snapshot import _read, _store, invalidate_roadmap
+
+SNAPSHOT = {"id": 7, "title": "Trip", "days": [], "tickets": []}
+
+
+@pytest.fixture(autouse=True)
+def server(monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(roadmap_snapshot, "binary_redis_client", fakeredis.FakeRedis(server=server))
+    monkeypatch.setattr(roadmap_snapshot, "async_binary_redis_client", aioredis.FakeRedis(server=server))
+
+
+def test_stored_snapshot_is_read_back():
+    version, data = asyncio.run(_read(7))
+    assert data is None
+    asyncio.run(_store(7, version, SNAPSHOT))
+    assert asyncio.run(_read(7))[1] == SNAPSHOT
+
+
+def test_invalidation_drops_the_snapshot():
+    asyncio.run(_store(7, None, SNAPSHOT))
+    invalidate_roadmap(7)
+    assert asyncio.run(_read(7))[1] is None
+
+
+def test_snapshot_read_before_a_write_is_not_stored():
+    version, _ = asyncio.run(_read(7))
+    invalidate_roadmap(7)  # a tool saved rows while the snapshot was being built
+    asyncio.run(_store(7, version, SNAPSHOT))
+    assert asyncio.run(_read(7))[1] is None
+
+    version, _ = asyncio.run(_read(7))
+    asyncio.run(_store(7, version, SNAPSHOT))
+    assert asyncio.run(_read(7))[1] == SNAPSHOT
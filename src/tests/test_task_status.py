@@ -0,0 +1,97 @@
+import json
+import threading
+import time
+
+import fakeredis
+import pytest
+from fakeredis import aioredis
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sse_starlette.sse import AppStatus
+
+import routes.tasks as tasks
+from celery_app import celery_app
+
+backend = celery_app.backend
+
+
+@pytest.fixture
+def client(monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(type(backend), "client", fakeredis.FakeRedis(server=server))
+    monkeypatch.setattr(tasks, "_backend_client", aioredis.FakeRedis(server=server))
+    # sse_starlette keeps one exit event per process, bound to the loop that created it
+    monkeypatch.setattr(AppStatus, "should_exit_event", None)
+    app = FastAPI()
+    app.include_router(tasks.router, prefix="/tasks")
+    # One event loop for all requests, like uvicorn
+    with TestClient(app) as client:
+        yield client
+
+
+def events(response):
+    """(event, data) pairs of a server-sent events response."""
+    pairs, event = [], None
+    for line in response.iter_lines():
+        if line.startswith("event:"):
+            event = line.split(":", 1)[1].strip()
+        elif line.startswith("data:"):
+            pairs.append((event, json.loads(line.split(":", 1)[1])))
+    return pairs
+
+
+def later(*steps):
+    def run():
+        for step in steps:
+            time.sleep(0.2)
+            step()
+    threading.Thread(target=run, daemon=True).start()
+
+
+@pytest.mark.parametrize("store, status, field", [
+    (lambda: None, "PENDING", None),
+    (lambda: backend.store_result("t", {"stage": "searching"}, "PROGRESS"), "PROGRESS", "progress"),
+    (lambda: backend.store_result("t", 3, "SUCCESS"), "SUCCESS", "result"),
+    (lambda: backend.mark_as_retry("t", ValueError("flaky")), "RETRY", "error"),
+    (lambda: backend.mark_as_revoked("t", "cancelled"), "REVOKED", None),
+    (lambda: backend.mark_as_failure("t", ValueError("boom")), "FAILURE", "error"),
+])
+def test_status_of_each_state(client, store, status, field):
+    store()
+    single = client.get("/tasks/status/t").json()
+    assert single["status"] == status
+    assert field is None or field in single
+    assert client.post("/tasks/status/batch", json={"task_ids": ["t"]}).json() == {"t": single}
+
+
+def test_stream_follows_a_retry_and_ends_when_revoked(client):
+    backend.store_result("done", 1, "SUCCESS")
+    later(
+        lambda: backend.mark_as_retry("t", ValueError("flaky")),
+        lambda: backend.store_result("t", {"stage": "searching"}, "PROGRESS"),
+        lambda: backend.mark_as_revoked("t", "cancelled"),
+    )
+    with client.stream("GET", "/tasks/stream?task_id=done&task_id=t") as response:
+        received = events(response)
+    assert [(event, data["task_id"], data["status"]) for event, data in received] == [
+        ("status", "done", "SUCCESS"),
+        ("status", "t", "PENDING"),
+        ("status", "t", "RETRY"),
+        ("status", "t", "PROGRESS"),
+        ("status", "t", "REVOKED"),
+    ]
+
+
+def test_stream_of_an_unknown_task_times_out(client, monkeypatch):
+    monkeypatch.setattr(tasks, "TASK_STREAM_IDLE_TIMEOUT", 0.5)
+    backend.store_result("done", 1, "SUCCESS")
+    later(lambda: backend.store_result("slow", None, "STARTED"))
+    started = time.monotonic()
+    with client.stream("GET", "/tasks/stream?task_id=unknown&task_id=slow&task_id=done") as response:
+        received = events(response)
+    assert [(event, data.get("status")) for event, data in received] == [
+        ("status", "PENDING"), ("status", "PENDING"), ("status", "SUCCESS"), ("status", "STARTED"), ("timeout", None),
+    ]
+    assert received[-1][1] == {"pending": ["unknown", "slow"]}
+    # The STARTED change reset the idle timer
+    assert 0.7 <= time.monotonic() - started < 5
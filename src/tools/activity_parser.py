@@ -1,5 +1,5 @@
 from sqlalchemy.orm import Session
-from schemas.models import Place
+from tools.persistence import save_places
 
 def find_activities(db: Session, roadmap_id: int, destination: str, interests: list) -> str:
     """
@@ -8,20 +8,20 @@ def find_activities(db: Session, roadmap_id: int, destination: str, interests: l
     """
     print(f"[TOOL] find_activities called with: roadmap_id={roadmap_id}, destination={destination}, interests={interests}")
     try:
-        for interest in interests:
-            activity = Place(
-                roadmap_id=roadmap_id,
-                name=f"{interest.capitalize()} Spot",
-                category=interest,
-                location=destination,
-                duration_min=120,
-                rating=4.5,
-                url=f"https://example.com/activity/{interest}"
-            )
-            db.add(activity)
-        
-        db.commit()
+        activities = [
+            {
+                "name": f"{interest.capitalize()} Spot",
+                "category": interest,
+                "location": destination,
+                "duration_min": 120,
+                "rating": 4.5,
+                "url": f"https://example.com/activity/{interest}",
+            }
+            for interest in interests
+        ]
+
+        save_places(db, roadmap_id, activities)
         return f"Found and saved {len(interests)} activities in {destination} based on your interests."
     except Exception as e:
         db.rollback()
-        return f"An error occurred while finding activities: {e}" 
\ No newline at end of file
+        return f"An error occurred while finding activities: {e}"
@@ -0,0 +1,151 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import redis
+
+import codec
+from config import redis_client, async_redis_client, async_binary_redis_client, FLIGHT_CACHE_TTL, FLIGHT_CACHE_STALE_TTL
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = "flight_search"
+STATS_KEY = f"{CACHE_PREFIX}:stats"
+REFRESH_LOCK_SECONDS = 60
+
+Fetch = Callable[[], Awaitable[Dict[str, Any]]]
+
+# Strong references to running refreshes so they are not garbage collected mid-flight.
+_refresh_tasks = set()
+
+# Search parameters that identify a result set. Everything else (api_key, hl, engine)
+# is either secret or constant and must not be part of the key.
+KEY_FIELDS = ("departure_id", "arrival_id", "outbound_date", "return_date", "currency")
+UPPERCASE_FIELDS = ("departure_id", "arrival_id", "currency")
+
+
+def make_cache_key(params: Dict[str, Any]) -> str:
+    """Builds a normalized cache key, e.g. flight_search:AKX:NQZ:2025-07-01:2025-07-03:KZT."""
+    parts = []
+    for field in KEY_FIELDS:
+        value = str(params.get(field) or "").strip()
+        parts.append(value.upper() if field in UPPERCASE_FIELDS else value)
+    return ":".join([CACHE_PREFIX, *parts])
+
+
+async def _record(counter: str):
+    try:
+        await async_redis_client.hincrby(STATS_KEY, counter, 1)
+    except redis.RedisError:
+        pass
+
+
+async def _store(key: str, results: Dict[str, Any]):
+    # SerpAPI reports failures inside the payload; never cache those.
+    if not isinstance(results, dict) or results.get("error"):
+        return
+    entry = {"fetched_at": time.time(), "results": results}
+    try:
+        await async_binary_redis_client.setex(key, FLIGHT_CACHE_TTL + FLIGHT_CACHE_STALE_TTL, codec.dumps(entry))
+    except redis.RedisError as e:
+        logger.warning(f"Could not store flight search {key}: {e}")
+
+
+async def _release(lock_key: str):
+    try:
+        await async_redis_client.delete(lock_key)
+    except redis.RedisError:
+        pass
+
+
+async def _acquire(lock_key: str) -> bool:
+    # Only one worker refreshes a given search at a time.
+    try:
+        return bool(await async_redis_client.set(lock_key, "1", nx=True, ex=REFRESH_LOCK_SECONDS))
+    except redis.RedisError:
+        return False
+
+
+async def _refresh(key: str, fetch: Fetch) -> Optional[Dict[str, Any]]:
+    """Replaces the entry with fresh results; returns them, or None if the fetch failed."""
+    try:
+        results = await fetch()
+    except Exception as e:
+        logger.warning(f"Refresh of {key} failed: {e}")
+        return None
+    await _store(key, results)
+    await _record("refreshes")
+    return results
+
+
+def _refresh_done(task: asyncio.Task, lock_key: str):
+    _refresh_tasks.discard(task)
+    if task.cancelled():
+        # e.g. the loop was shut down; the task body (and its finally) may never have run.
+        # There is no loop left to await on, so the sync client releases the lock.
+        try:
+            redis_client.delete(lock_key)
+        except redis.RedisError:
+            pass
+    elif task.exception() is not None:
+        logger.warning(f"Background refresh failed: {task.exception()}")
+
+
+async def _refresh_in_background(key: str, fetch: Fetch):
+    lock_key = f"{key}:refreshing"
+    if not await _acquire(lock_key):
+        return
+
+    async def refresh():
+        try:
+            await _refresh(key, fetch)
+        finally:
+            await _release(lock_key)
+
+    task = asyncio.create_task(refresh())
+    _refresh_tasks.add(task)
+    task.add_done_callback(lambda t: _refresh_done(t, lock_key))
+
+
+async def cached_search(params: Dict[str, Any], fetch: Fetch, background_refresh: bool = True) -> Dict[str, Any]:
+    """
+    Returns the flight search results for params, awaiting fetch() only when needed.
+    Fresh entries are returned directly; stale entries are returned immediately while
+    fetch() runs as a background task to replace them.
+
+    Callers whose event loop ends right after the call (asyncio.run() in Celery tasks)
+    pass background_refresh=False: a stale entry is then refreshed before returning, and
+    only served if the refresh fails.
+    """
+    key = make_cache_key(params)
+    try:
+        raw = await async_binary_redis_client.get(key)
+    except redis.RedisError as e:
+        logger.warning(f"Flight cache unavailable, searching directly: {e}")
+        return await fetch()
+
+    if raw:
+        entry = codec.loads(raw)
+        if time.time() - entry["fetched_at"] < FLIGHT_CACHE_TTL:
+            await _record("hits")
+        else:
+            await _record("stale_hits")
+            if not background_refresh:
+                return await _refresh(key, fetch) or entry["results"]
+            await _refresh_in_background(key, fetch)
+        return entry["results"]
+
+    await _record("misses")
+    results = await fetch()
+    await _store(key, results)
+    return results
+
+
+def get_cache_stats() -> Dict[str, Any]:
+    """Returns the hit/miss counters shared by all workers."""
+    counters = {k: int(v) for k, v in redis_client.hgetall(STATS_KEY).items()}
+    served = counters.get("hits", 0) + counters.get("stale_hits", 0)
+    total = served + counters.get("misses", 0)
+    counters["hit_ratio"] = served / total if total else 0.0
+    return counters
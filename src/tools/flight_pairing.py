@@ -0,0 +1,168 @@
+import heapq
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+# (option, first segment) as found in a SerpAPI google_flights payload
+Leg = Tuple[Dict[str, Any], Dict[str, Any]]
+
+
+def _as_int(value: Any) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _build_segment(option: Dict[str, Any], seg: Dict[str, Any], direction: Optional[str]) -> Dict[str, Any]:
+    return {
+        "from_airport": {
+            "name": seg['departure_airport']['name'],
+            "code": seg['departure_airport']['id'],
+            "time": seg['departure_airport']['time'],
+        },
+        "to_airport": {
+            "name": seg['arrival_airport']['name'],
+            "code": seg['arrival_airport']['id'],
+            "time": seg['arrival_airport']['time'],
+        },
+        "airline": seg.get('airline', 'Unknown'),
+        "flight_number": seg.get('flight_number', 'Unknown'),
+        "travel_class": seg.get('travel_class', 'Unknown'),
+        "airplane": seg.get('airplane', 'Unknown'),
+        "duration": int(seg.get('duration', 0)),
+        "direction": direction,
+        # The leg's own fare; the option's "price" of a round trip is the pair total
+        "price": option.get('price'),
+    }
+
+
+def _direction(dep_date: str, start_date: str, end_date: str) -> str:
+    if dep_date == start_date:
+        return 'outbound'
+    if dep_date == end_date:
+        return 'return'
+    # fallback: treat as outbound if before end_date, else return
+    return 'outbound' if dep_date < end_date else 'return'
+
+
+def split_by_direction(flights_list: List[Dict[str, Any]], start_date: str, end_date: str) -> Tuple[List[Leg], List[Leg]]:
+    """Separates flight options into outbound and return legs by departure date."""
+    outbound, returns = [], []
+    for option in flights_list:
+        if 'flights' in option and option['flights']:
+            seg = option['flights'][0]
+            dep_date = seg['departure_airport']['time'].split(' ')[0]
+            if _direction(dep_date, start_date, end_date) == 'outbound':
+                outbound.append((option, seg))
+            else:
+                returns.append((option, seg))
+    return outbound, returns
+
+
+def _outbound_cost(option: Dict[str, Any]) -> float:
+    price = _as_int(option.get('price'))
+    return float('inf') if price is None else price
+
+
+def _return_cost(option: Dict[str, Any]) -> int:
+    # A return leg without a usable price does not change the pair price (see _pair_price).
+    return _as_int(option.get('price')) or 0
+
+
+def _pair_price(out_opt: Dict[str, Any], ret_opt: Dict[str, Any]) -> Any:
+    # Price: sum if both, else just outbound
+    price = out_opt.get('price', 0)
+    if ret_opt.get('price'):
+        try:
+            price = int(price) + int(ret_opt.get('price', 0))
+        except Exception:
+            pass
+    return price
+
+
+def _cheapest_pairs(outbound: List[Leg], returns: List[Leg], limit: int) -> List[Tuple[Leg, Leg]]:
+    """
+    Returns the `limit` cheapest (outbound, return) pairs where the outbound arrival
+    airport equals the return departure airport.
+
+    Returns are indexed by departure airport and both sides are sorted by price, so the
+    cheapest pairs can be walked lazily with a heap frontier (k smallest sums of two
+    sorted lists) instead of materializing outbound x returns.
+    """
+    returns_by_airport = defaultdict(list)
+    for leg in returns:
+        returns_by_airport[leg[1]['departure_airport']['id']].append(leg)
+
+    outbound_by_airport = defaultdict(list)
+    for leg in outbound:
+        airport = leg[1]['arrival_airport']['id']
+        if airport in returns_by_airport:
+            outbound_by_airport[airport].append(leg)
+
+    groups = []
+    for airport, outs in outbound_by_airport.items():
+        # Stable sorts keep the provider's ordering among equally priced legs.
+        outs = sorted(outs, key=lambda leg: _outbound_cost(leg[0]))
+        rets = sorted(returns_by_airport[airport], key=lambda leg: _return_cost(leg[0]))
+        groups.append((outs, rets))
+
+    def cost(g: int, i: int, j: int) -> float:
+        outs, rets = groups[g]
+        return _outbound_cost(outs[i][0]) + _return_cost(rets[j][0])
+
+    frontier = [(cost(g, 0, 0), g, 0, 0) for g in range(len(groups))]
+    heapq.heapify(frontier)
+    seen = {(g, 0, 0) for g in range(len(groups))}
+    best = []
+    while frontier and len(best) < limit:
+        _, g, i, j = heapq.heappop(frontier)
+        outs, rets = groups[g]
+        best.append((outs[i], rets[j]))
+        for ni, nj in ((i + 1, j), (i, j + 1)):
+            if ni < len(outs) and nj < len(rets) and (g, ni, nj) not in seen:
+                seen.add((g, ni, nj))
+                heapq.heappush(frontier, (cost(g, ni, nj), g, ni, nj))
+    return best
+
+
+def pair_flights(results: Dict[str, Any], flights_list: List[Dict[str, Any]], start_date: str, end_date: str, limit: int = 8) -> List[Dict[str, Any]]:
+    """Builds up to `limit` round-trip options, cheapest total price first."""
+    outbound, returns = split_by_direction(flights_list, start_date, end_date)
+    currency = results.get('search_parameters', {}).get('currency', 'Unknown')
+    paired = []
+    for (out_opt, out_seg), (ret_opt, ret_seg) in _cheapest_pairs(outbound, returns, limit):
+        paired.append({
+            "segments": [_build_segment(out_opt, out_seg, 'outbound'), _build_segment(ret_opt, ret_seg, 'return')],
+            "price": _pair_price(out_opt, ret_opt),
+            "currency": currency,
+            "type": out_opt.get('type', 'Unknown'),
+            "buy_url": out_opt.get('link') or ret_opt.get('link') or "Not available",
+            "num_stops": 0,  # single segment each way
+            "stop_airports": []
+        })
+    return paired
+
+
+def single_leg_flights(results: Dict[str, Any], flights_list: List[Dict[str, Any]], start_date: str, end_date: str, limit: int = 8) -> List[Dict[str, Any]]:
+    """Fallback when nothing can be paired: one direction per option, in provider order."""
+    currency = results.get('search_parameters', {}).get('currency', 'Unknown')
+    structured_flights = []
+    for option in flights_list[:limit]:
+        if 'flights' in option and option['flights']:
+            seg = option['flights'][0]
+        else:
+            continue
+        try:
+            direction = _direction(seg['departure_airport']['time'].split(' ')[0], start_date, end_date)
+        except Exception:
+            direction = 'unknown'
+        structured_flights.append({
+            "segments": [_build_segment(option, seg, direction)],
+            "price": option.get('price', 'Unknown'),
+            "currency": currency,
+            "type": option.get('type', 'Unknown'),
+            "buy_url": option.get('link') or "Not available",
+            "num_stops": 0,
+            "stop_airports": []
+        })
+    return structured_flights
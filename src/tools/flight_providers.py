@@ -0,0 +1,148 @@
+import asyncio
+import os
+import random
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# "serpapi" for real searches, "stub" for local development, tests and benchmarks
+FLIGHT_PROVIDER = os.getenv("FLIGHT_PROVIDER", "serpapi")
+FLIGHT_PROVIDER_TIMEOUT = float(os.getenv("FLIGHT_PROVIDER_TIMEOUT", "30"))
+FLIGHT_PROVIDER_MAX_CONNECTIONS = int(os.getenv("FLIGHT_PROVIDER_MAX_CONNECTIONS", "20"))
+
+
+class FlightProviderError(Exception):
+    """The provider answered with something that is not a search result."""
+
+
+class FlightProvider(ABC):
+    """Interface for flight search backends. search() takes SerpAPI google_flights params
+    (without api_key) and returns a SerpAPI-shaped payload."""
+
+    name = "base"
+
+    @abstractmethod
+    async def search(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        ...
+
+    async def aclose(self):
+        pass
+
+
+class SerpApiFlightProvider(FlightProvider):
+    name = "serpapi"
+    BASE_URL = "https://serpapi.com/search.json"
+
+    def __init__(self, api_key: Optional[str] = None, timeout: float = FLIGHT_PROVIDER_TIMEOUT, max_connections: int = FLIGHT_PROVIDER_MAX_CONNECTIONS):
+        self.api_key = api_key or os.environ.get("SERPAPI_API_KEY")
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # An AsyncClient is bound to the loop it was first used on. The API process has a
+        # single loop; Celery tasks run under a fresh asyncio.run() each and close the
+        # client before their loop ends (celery_tasks._run_async), so none is left behind.
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+            )
+            self._client_loop = loop
+        return self._client
+
+    async def search(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        response = await self._get_client().get(self.BASE_URL, params={**params, "api_key": self.api_key})
+        # SerpAPI reports errors as JSON bodies ({"error": ...}), whatever the status code.
+        # Anything else, e.g. a proxy's HTML error page, is not passed on as a result.
+        content_type = response.headers.get("content-type", "")
+        if "json" in content_type:
+            try:
+                payload = response.json()
+            except ValueError:
+                payload = None
+            if isinstance(payload, dict) and (response.is_success or "error" in payload):
+                return payload
+        raise FlightProviderError(
+            f"Flight search failed: SerpAPI answered HTTP {response.status_code} with {content_type or 'no content type'}"
+        )
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._client_loop = None
+
+
+def build_stub_results(params: Dict[str, Any], num_options: int = 40, seed: int = 0) -> Dict[str, Any]:
+    """Deterministic SerpAPI-shaped payload: half outbound options, half return options."""
+    rng = random.Random(seed)
+    departure, arrival = params["departure_id"], params["arrival_id"]
+    options = []
+    for i in range(num_options):
+        outbound = i % 2 == 0
+        dep, arr = (departure, arrival) if outbound else (arrival, departure)
+        day = params["outbound_date"] if outbound else params["return_date"]
+        options.append({
+            "flights": [{
+                "departure_airport": {"name": f"{dep} Airport", "id": dep, "time": f"{day} {rng.randint(0, 21):02d}:00"},
+                "arrival_airport": {"name": f"{arr} Airport", "id": arr, "time": f"{day} 23:30"},
+                "airline": "Air Astana",
+                "flight_number": f"KC {1000 + i}",
+                "travel_class": "Economy",
+                "airplane": "Airbus A321neo",
+                "duration": rng.randint(60, 400),
+            }],
+            "price": rng.randint(20000, 200000),
+            "type": "Round trip",
+            "link": f"https://example.com/book/{i}",
+        })
+    return {"best_flights": options, "search_parameters": {"currency": params.get("currency", "KZT")}}
+
+
+class StubFlightProvider(FlightProvider):
+    """Local provider that never leaves the process; latency simulates a remote call."""
+
+    name = "stub"
+
+    def __init__(self, num_options: int = 40, latency: float = 0.0):
+        self.num_options = num_options
+        self.latency = latency
+
+    async def search(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return build_stub_results(params, self.num_options)
+
+
+PROVIDERS = {
+    SerpApiFlightProvider.name: SerpApiFlightProvider,
+    StubFlightProvider.name: StubFlightProvider,
+}
+
+_provider: Optional[FlightProvider] = None
+
+
+def get_flight_provider() -> FlightProvider:
+    """Returns the process-wide provider selected by FLIGHT_PROVIDER."""
+    global _provider
+    if _provider is None:
+        _provider = PROVIDERS[FLIGHT_PROVIDER]()
+    return _provider
+
+
+def set_flight_provider(provider: FlightProvider):
+    """Replaces the process-wide provider (e.g. with a StubFlightProvider in tests)."""
+    global _provider
+    _provider = provider
+
+
+async def close_flight_provider():
+    if _provider is not None:
+        await _provider.aclose()
@@ -1,6 +1,5 @@
 from sqlalchemy.orm import Session
-from schemas.models import AccommodationInDB
-from datetime import datetime
+from tools.persistence import save_accommodations
 
 def find_hotels(db: Session, roadmap_id: int, destination: str, check_in_date: str, check_out_date: str, preference: str) -> str:
     """
@@ -9,22 +8,18 @@ def find_hotels(db: Session, roadmap_id: int, destination: str, check_in_date: s
     """
     print(f"[TOOL] find_hotels called with: roadmap_id={roadmap_id}, destination={destination}, check_in_date={check_in_date}, check_out_date={check_out_date}, preference={preference}")
     try:
-        hotel_name = f"{preference.capitalize()} Hotel in {destination}"
-        
-        hotel = AccommodationInDB(
-            roadmap_id=roadmap_id,
-            name=hotel_name,
-            check_in=datetime.strptime(check_in_date, "%Y-%m-%d"),
-            check_out=datetime.strptime(check_out_date, "%Y-%m-%d"),
-            price_total=500,
-            location=destination,
-            provider_url="https://example.com/hotel"
-        )
+        hotel = {
+            "name": f"{preference.capitalize()} Hotel in {destination}",
+            "check_in": check_in_date,
+            "check_out": check_out_date,
+            "price_total": 500,
+            "location": destination,
+            "provider_url": "https://example.com/hotel",
+        }
 
-        db.add(hotel)
-        db.commit()
+        save_accommodations(db, roadmap_id, [hotel])
         
         return f"Found and saved a '{preference}' hotel in {destination}."
     except Exception as e:
         db.rollback()
-        return f"An error occurred while finding hotels: {e}" 
\ No newline at end of file
+        return f"An error occurred while finding hotels: {e}"
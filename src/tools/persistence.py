@@ -0,0 +1,108 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from roadmap_snapshot import invalidate_roadmap
+from schemas.models import Ticket, AccommodationInDB, Place
+
+# Tool results are written with one INSERT ... ON CONFLICT DO NOTHING per call, against
+# the natural-key unique indexes on each table, so repeating a search adds no duplicates.
+# The indexes are NULLS NOT DISTINCT, so rows with missing key values are deduplicated too.
+# Every write that adds rows invalidates the roadmap's cached snapshot.
+TICKET_KEY = ["roadmap_id", "flight_number", "from_", "to", "departure"]
+ACCOMMODATION_KEY = ["roadmap_id", "name", "check_in", "check_out"]
+PLACE_KEY = ["roadmap_id", "name", "location"]
+
+
+def _as_int(value) -> Optional[int]:
+    # Providers report a missing price as e.g. 'Unknown'; it is stored as NULL
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _flight_number(value: Optional[str]) -> Optional[str]:
+    # 'Unknown' is the display placeholder from tools/flight_pairing.py, not a flight number;
+    # stored as such it would make every unnumbered flight with the same route and time one row
+    return None if value in (None, "", "Unknown") else value
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    try:
+        return datetime.strptime(value, "%Y-%m-%d %H:%M")
+    except (TypeError, ValueError):
+        return None
+
+
+def _insert_ignore(db: Session, model, rows: List[Dict], key: List[str]) -> int:
+    """Inserts rows not already stored under `key`; commits and returns how many were new."""
+    # Repeated keys within the batch would only be skipped by the database anyway
+    seen, unique = set(), []
+    for row in rows:
+        row_key = tuple(row[c] for c in key)
+        if row_key not in seen:
+            seen.add(row_key)
+            unique.append(row)
+    if not unique:
+        return 0
+    result = db.execute(insert(model).values(unique).on_conflict_do_nothing(index_elements=[getattr(model, c) for c in key]))
+    db.commit()
+    if result.rowcount != 0:
+        for roadmap_id in {row["roadmap_id"] for row in unique}:
+            invalidate_roadmap(roadmap_id)
+    return result.rowcount
+
+
+def save_tickets(db: Session, roadmap_id: int, flights: List[Dict]) -> int:
+    """One row per flight segment of the structured options from tools/flight_pairing.py."""
+    rows = []
+    for flight in flights:
+        for segment in flight.get("segments", []):
+            rows.append({
+                "roadmap_id": roadmap_id,
+                "type": segment.get("direction"),
+                "from_": segment["from_airport"].get("code"),
+                "to": segment["to_airport"].get("code"),
+                "departure": _parse_time(segment["from_airport"].get("time")),
+                "arrival": _parse_time(segment["to_airport"].get("time")),
+                # Per leg: a paired option's price is the round-trip total
+                "price": _as_int(segment.get("price")),
+                "provider_url": flight.get("buy_url"),
+                "flight_number": _flight_number(segment.get("flight_number")),
+            })
+    return _insert_ignore(db, Ticket, rows, TICKET_KEY)
+
+
+def save_accommodations(db: Session, roadmap_id: int, hotels: List[Dict]) -> int:
+    rows = [
+        {
+            "roadmap_id": roadmap_id,
+            "name": hotel["name"],
+            "check_in": datetime.strptime(hotel["check_in"], "%Y-%m-%d"),
+            "check_out": datetime.strptime(hotel["check_out"], "%Y-%m-%d"),
+            "price_total": _as_int(hotel.get("price_total")),
+            "location": hotel.get("location"),
+            "provider_url": hotel.get("provider_url"),
+        }
+        for hotel in hotels
+    ]
+    return _insert_ignore(db, AccommodationInDB, rows, ACCOMMODATION_KEY)
+
+
+def save_places(db: Session, roadmap_id: int, places: List[Dict]) -> int:
+    rows = [
+        {
+            "roadmap_id": roadmap_id,
+            "name": place["name"],
+            "category": place.get("category"),
+            "location": place.get("location"),
+            "duration_min": place.get("duration_min"),
+            "rating": place.get("rating"),
+            "url": place.get("url"),
+        }
+        for place in places
+    ]
+    return _insert_ignore(db, Place, rows, PLACE_KEY)